@@ -6,18 +6,36 @@ TAGS_FILE = Path("data/tags.json")
 POINT_CLOUD_FILE = Path("./CS12-MockWarehouse.ply")
 PHOTOS_DIR = Path("data/tag_photos")
 PHOTOS_DIR.mkdir(parents=True, exist_ok=True)
+POINT_CLOUD_CACHE_DIR = Path.home() / ".cache" / "hacx"  # Decoded clouds as .npz
+POINT_CLOUD_CACHE_MAX_BYTES = 200 * 1024 * 1024
 
 # UI Constants
 WINDOW_TITLE = "Point Cloud Annotation Studio"
 WINDOW_WIDTH = 1800
 WINDOW_HEIGHT = 1000
 PANEL_WIDTH = 450
+PHOTO_COPY_WORKERS = 4  # Background threads copying tag photos
 
 # Marker settings
 MARKER_RADIUS = 0.15
 TEMP_MARKER_RADIUS = 0.12
+MARKER_SPHERE_RESOLUTION = 8  # Open3D create_sphere resolution; the default is 20
 POINT_SIZE = 2
+INTERACTION_POINT_STRIDE = 4  # Keep every Nth point while the camera is moving
+INTERACTION_IDLE_SECONDS = 0.25  # Idle time before full density is restored
+LOD_LEVELS = 3  # Voxel-downsampled clouds, each with twice the previous voxel size
+LOD_VOXEL_DIVISOR = 256  # Finest LoD voxel = largest bounds extent / this
+LOD_NEAR_DISTANCE = 1.5  # Camera distance, in bounds extents, drawn at full density
 
 # Colors
 BACKGROUND_COLOR = [0.12, 0.14, 0.18, 1]
 TEMP_MARKER_COLOR = [1, 0.843, 0]
+TEMP_MARKER_COLOR_RGBA = (*TEMP_MARKER_COLOR, 1.0)
+DEFAULT_TAG_COLOR = [1.0, 0.0, 0.0]  # Tags saved without a color
+
+# Evidence processing
+GEMINI_MAX_CONCURRENCY = 8
+GEMINI_MAX_RETRIES = 5
+GEMINI_MAX_IMAGE_EDGE = 1024  # Longest side of photos sent for detection
+PHOTO_WORKERS = 8
+GEMINI_BATCH_SIZE = 1  # Photos per request; Gemini accepts several images at once
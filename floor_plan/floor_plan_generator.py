@@ -7,151 +7,350 @@ Full open-source pipeline for:
     - Exporting each wall/ceiling as separate files
 
 FIXED: Coordinates now start at (0, 0) for easy viewing
-FIXED: Added .buffer(0) to clean polygons and prevent TopologyException
+FIXED: Added .buffer(0) to clean invalid polygons and prevent TopologyException
 """
 
 import open3d as o3d
 import numpy as np
 import matplotlib.pyplot as plt
-from shapely.geometry import Polygon, MultiPolygon, MultiPoint, GeometryCollection
+import shapely
+from shapely.geometry import Polygon, MultiPolygon, MultiPoint, GeometryCollection, shape
 from shapely.ops import unary_union
 from shapely import affinity
 from skimage import measure
 import os
+import hashlib
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from fast_histogram import histogram2d as fast_histogram2d
+except ImportError:  # optional accelerator, fall back to NumPy
+    fast_histogram2d = None
+
+try:
+    import cv2
+except ImportError:  # optional accelerator, fall back to skimage contours
+    cv2 = None
+
+try:
+    from rasterio.features import shapes as rasterio_shapes
+    from affine import Affine
+except ImportError:  # optional, fall back to contour tracing + repair
+    rasterio_shapes = None
+
+try:
+    from plyfile import PlyData
+except ImportError:  # optional, fall back to Open3D's in-memory reader
+    PlyData = None
+
+try:
+    from numba import njit
+except ImportError:  # optional accelerator, fall back to per-slice histograms
+    njit = None
 
 # ======== STEP 1: LOAD POINT CLOUD ========
 
 PLY_FILE = "../tagged_cloud_20251104_114651.ply"
-pcd = o3d.io.read_point_cloud(PLY_FILE)
-print(f"[+] Loaded point cloud with {np.asarray(pcd.points).shape[0]} points")
-
-points = np.asarray(pcd.points)
-
-# ======== NORMALIZE COORDINATES TO START AT (0,0,0) ========
-x_min_orig, y_min_orig, z_min_orig = points.min(axis=0)
-points_normalized = points - np.array([x_min_orig, y_min_orig, z_min_orig])
-print(f"[+] Normalized coordinates - Origin offset: X={x_min_orig:.2f}, Y={y_min_orig:.2f}, Z={z_min_orig:.2f}")
-
-# Use normalized points for all subsequent operations
-points = points_normalized
-
-# ======== STEP 2: AUTO-ALIGN USING PCA ========
-# Align the point cloud to principal axes to remove tilt
-floor_threshold_temp = np.percentile(points[:, 2], 2) + 0.05
-floor_points_temp = points[points[:, 2] < floor_threshold_temp]
-floor_xy_temp = floor_points_temp[:, :2]
-
-# Compute PCA on floor points (XY plane)
-mean_xy = floor_xy_temp.mean(axis=0)
-centered = floor_xy_temp - mean_xy
-cov_matrix = np.cov(centered.T)
-eigenvalues, eigenvectors = np.linalg.eig(cov_matrix)
-
-# Sort eigenvectors by eigenvalues (largest first)
-idx = eigenvalues.argsort()[::-1]
-eigenvectors = eigenvectors[:, idx]
-
-# Ensure right-handed coordinate system (determinant should be positive)
-if np.linalg.det(eigenvectors) < 0:
-    eigenvectors[:, 1] = -eigenvectors[:, 1]
-
-# Create rotation matrix to align to axes
-rotation_matrix_2d = eigenvectors.T
-
-# Apply rotation to all points (XY plane only)
-points_xy = points[:, :2]
-points_xy_centered = points_xy - mean_xy
-points_xy_rotated = points_xy_centered @ rotation_matrix_2d.T
-points[:, :2] = points_xy_rotated
-
-# Recenter after rotation to start at (0,0)
-xy_min = points[:, :2].min(axis=0)
-points[:, :2] = points[:, :2] - xy_min
-
-print(f"[+] Applied PCA alignment - removed tilt from floor plan")
+resolution = 0.02  # 2 cm/pixel for every raster below
+# Half the raster cell so a flat floor still puts several points in a cell
+# (the occupancy threshold below needs more than one hit per cell)
+VOXEL_SIZE = resolution / 2
+CACHE_DIR = Path(".cache")
+
+
+def z_percentile(z, q):
+    """q-th percentile of z by O(n) selection instead of a sort"""
+    k = int(round(q / 100 * (len(z) - 1)))
+    return np.partition(z, k)[k]
+
+
+def read_normalized_points(path):
+    """Read XYZ shifted so the minimum corner is (0,0,0), as float32"""
+    if PlyData is not None:
+        # Memory-mapped vertex columns: min and shift stream straight from
+        # the file into the float32 array, no float64 copy of the cloud
+        vertex = PlyData.read(path, mmap="c")["vertex"]
+        columns = [vertex[axis] for axis in ("x", "y", "z")]
+    else:
+        columns = np.asarray(o3d.io.read_point_cloud(path).points).T
+
+    points = np.empty((len(columns[0]), 3), dtype=np.float32)
+    origin = []
+    for k, column in enumerate(columns):
+        # Subtract in the source precision (absolute coordinates can be
+        # large) but store float32: every later pass is memory-bound and
+        # 2 cm bins need nowhere near float64 once the origin is at zero
+        column_min = column.min()
+        np.subtract(column, column_min, out=points[:, k], casting="same_kind")
+        origin.append(float(column_min))
+    return points, origin
+
+
+def load_aligned_points(path):
+    """Load, normalize, downsample and PCA-align the cloud (steps 1-2)"""
+    # ======== NORMALIZE COORDINATES TO START AT (0,0,0) ========
+    points, (x_min_orig, y_min_orig, z_min_orig) = read_normalized_points(path)
+    print(f"[+] Loaded point cloud with {len(points)} points")
+    print(f"[+] Normalized coordinates - Origin offset: X={x_min_orig:.2f}, Y={y_min_orig:.2f}, Z={z_min_orig:.2f}")
+
+    # Tensor geometry downsamples the float32 array in place of a legacy
+    # float64 copy
+    downsampled = o3d.t.geometry.PointCloud(
+        o3d.core.Tensor.from_numpy(points)
+    ).voxel_down_sample(voxel_size=VOXEL_SIZE)
+    points = downsampled.point.positions.numpy()
+    print(f"[+] Voxel-downsampled to {len(points)} points ({VOXEL_SIZE * 100:.0f} cm voxels)")
+
+    # ======== STEP 2: AUTO-ALIGN USING PCA ========
+    # Align the point cloud to principal axes to remove tilt.
+    # The floor band depends on Z only, which the XY rotation leaves alone,
+    # so this mask is also the final floor selection in step 3.
+    floor_threshold = z_percentile(points[:, 2], 2) + 0.05  # 5cm above lowest point
+    floor_mask = points[:, 2] < floor_threshold
+    floor_xy_temp = points[floor_mask, :2]
+
+    # Compute PCA on floor points (XY plane)
+    mean_xy = floor_xy_temp.mean(axis=0)
+    centered = floor_xy_temp - mean_xy
+    cov_matrix = np.cov(centered.T)
+    # Covariance is symmetric: eigh gives real eigenpairs in ascending order
+    eigenvalues, eigenvectors = np.linalg.eigh(cov_matrix)
+
+    # Reorder eigenvectors by eigenvalues (largest first)
+    eigenvectors = eigenvectors[:, ::-1]
+
+    # Ensure right-handed coordinate system (determinant should be positive)
+    if np.linalg.det(eigenvectors) < 0:
+        eigenvectors[:, 1] = -eigenvectors[:, 1]
+
+    # Create rotation matrix to align to axes (float32 so the product stays float32)
+    rotation_matrix_2d = eigenvectors.T.astype(np.float32)
+
+    # Apply rotation to all points (XY plane only) and recenter to start at (0,0).
+    # Centering on mean_xy before rotating only shifts the result by a constant
+    # that the recentering removes again, so rotate the raw XY in one BLAS call
+    # and shift by the rotated minimum in place.
+    points_xy_rotated = points[:, :2] @ rotation_matrix_2d.T
+    points_xy_rotated -= points_xy_rotated.min(axis=0)
+    points[:, :2] = points_xy_rotated
+
+    print(f"[+] Applied PCA alignment - removed tilt from floor plan")
+    return points, floor_mask, floor_threshold, rotation_matrix_2d, mean_xy
+
+
+# Steps 1-2 only depend on the input file and voxel size, so their result is
+# cached on disk and reused until the PLY changes
+cache_key = hashlib.md5(
+    f"{os.path.abspath(PLY_FILE)}-{os.path.getmtime(PLY_FILE)}-{VOXEL_SIZE}-v2".encode()
+).hexdigest()
+cache_path = CACHE_DIR / f"{cache_key}.npz"
+
+if cache_path.exists():
+    with np.load(cache_path) as cached:
+        points = cached["points"]
+        floor_mask = cached["floor_mask"]
+        floor_threshold = cached["floor_threshold"].item()
+        rotation_matrix_2d = cached["rot"]
+        mean_xy = cached["mean"]
+    print(f"[+] Loaded {len(points)} aligned points from cache {cache_path}")
+else:
+    points, floor_mask, floor_threshold, rotation_matrix_2d, mean_xy = load_aligned_points(PLY_FILE)
+    CACHE_DIR.mkdir(exist_ok=True)
+    np.savez(
+        cache_path, points=points, floor_mask=floor_mask,
+        floor_threshold=floor_threshold, rot=rotation_matrix_2d, mean=mean_xy
+    )
 
 # ======== STEP 3: ORIENT AND SLICE TO FLOOR PLANE ========
-# Align Z as height; we assume floor is near the lowest z-values
-floor_threshold = np.percentile(points[:, 2], 2) + 0.05  # 5cm above lowest point
-floor_points = points[points[:, 2] < floor_threshold]
+# Align Z as height; we assume floor is near the lowest z-values.
+# floor_mask comes from step 2 (same Z threshold, rotation is XY only)
+floor_points = points[floor_mask]
 
 # 2D projection (x,y)
 floor_xy = floor_points[:, :2]
 
 # ======== STEP 3: BUILD FLOOR PLAN OUTLINE ========
-# Convert XY points into density grid
-resolution = 0.02  # 2 cm/pixel
-x_min, y_min = floor_xy.min(axis=0)
-x_max, y_max = floor_xy.max(axis=0)
+# Convert XY points into density grid. The grid is shared with the wall
+# slices, so it spans every point, not just the floor band (wall points
+# outside the floor's extent used to be dropped). Alignment recentered XY
+# to start at (0,0), so only the maximum needs a pass.
+x_min, y_min = 0.0, 0.0
+x_max, y_max = points[:, :2].max(axis=0)
+
+# Regular cells are fully described by origin, resolution and count;
+# no bin-edge arrays are needed
+nx = int(np.ceil((x_max - x_min) / resolution))
+ny = int(np.ceil((y_max - y_min) / resolution))
+grid_range = ((x_min, x_min + nx * resolution), (y_min, y_min + ny * resolution))
+
+
+def occupancy_grid(xy):
+    """Count XY points per cell of the shared floor-plan grid"""
+    if fast_histogram2d is not None:
+        # Regular bins: pure C loop, no edge search
+        return fast_histogram2d(xy[:, 0], xy[:, 1], bins=(nx, ny), range=grid_range)
+    # Flat integer cell index + bincount: one C loop, no edge searchsorted
+    ix = np.floor((xy[:, 0] - x_min) / resolution).astype(np.intp)
+    iy = np.floor((xy[:, 1] - y_min) / resolution).astype(np.intp)
+    inside = (ix >= 0) & (ix < nx) & (iy >= 0) & (iy < ny)
+    flat = ix[inside] * ny + iy[inside]
+    return np.bincount(flat, minlength=nx * ny).reshape(nx, ny)
+
+
+if njit is not None:
+    @njit(cache=True)
+    def bin_layers(pts, floor_z, z0, dz, ns, x0, y0, r, nx, ny):
+        """Bin floor band (layer 0) and every Z slice (layers 1..ns) in one pass"""
+        # Serial on purpose: a prange scatter into shared cells would race,
+        # and per-thread grid copies cost more memory than the pass saves
+        grids = np.zeros((ns + 1, nx, ny), np.int32)
+        for i in range(pts.shape[0]):
+            z = pts[i, 2]
+            s = int(np.floor((z - z0) / dz))
+            in_floor = z < floor_z
+            in_slice = 0 <= s < ns
+            ix = int(np.floor((pts[i, 0] - x0) / r))
+            iy = int(np.floor((pts[i, 1] - y0) / r))
+            if ix < 0 or ix >= nx or iy < 0 or iy >= ny:
+                continue
+            if in_floor:
+                grids[0, ix, iy] += 1
+            if in_slice:
+                grids[s + 1, ix, iy] += 1
+        return grids
+else:
+    bin_layers = None
+
+# Z layout shared by the floor grid and the wall slices (STEP 4)
+z_values = points[:, 2]
+z_min, z_max = z_values.min(), z_values.max()
+n_slices = 4  # number of vertical slices
+slice_thickness = (z_max - z_min) / n_slices
 
-x_bins = np.arange(x_min, x_max, resolution)
-y_bins = np.arange(y_min, y_max, resolution)
+if bin_layers is not None:
+    layer_grids = bin_layers(
+        points, floor_threshold, z_min, slice_thickness, n_slices,
+        x_min, y_min, resolution, nx, ny
+    )
+    grid = layer_grids[0]
+else:
+    layer_grids = None
+    grid = occupancy_grid(floor_xy)
+
+
+def cascaded_union(polys, chunk=32):
+    """Union polygons in fixed-size groups, then union the groups"""
+    # GEOS scales poorly on one large flat union; a tree of small ones
+    # gives the same geometry much faster for many contour polygons
+    if len(polys) <= chunk:
+        return unary_union(polys)
+    return cascaded_union(
+        [unary_union(polys[i:i + chunk]) for i in range(0, len(polys), chunk)],
+        chunk
+    )
+
+
+MIN_POLYGON_AREA = 0.05  # m², filters tiny noise
+
+
+def trace_contours(binary):
+    """Outline occupied cells as (n, 2) arrays of (x, y) cell coordinates"""
+    if cv2 is not None:
+        # Only outer boundaries: holes are filled by the union anyway
+        found, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        min_cells = MIN_POLYGON_AREA / resolution ** 2
+        # OpenCV points are (column, row), i.e. (y, x) on our [x, y] grid
+        return [c[:, 0, ::-1] for c in found
+                if len(c) >= 3 and cv2.contourArea(c) > min_cells]
+    return [c for c in measure.find_contours(binary, 0.5) if len(c) >= 3]
+
+
+# Raster rows are X and columns are Y on our [x, y] grid, so the affine
+# swaps axes instead of the array being transposed
+GRID_TRANSFORM = Affine(0, resolution, x_min, resolution, 0, y_min) if rasterio_shapes else None
+
+
+def polygonize_binary(binary):
+    """Vectorize occupied regions with rasterio; shapes are valid as emitted"""
+    polys = np.array([
+        shape(geom)
+        for geom, _ in rasterio_shapes(binary, mask=binary.view(bool), transform=GRID_TRANSFORM)
+    ], dtype=object)
+    if not len(polys):
+        return []
+    return list(polys[shapely.area(polys) > MIN_POLYGON_AREA])
+
+
+def grid_polygons(grid):
+    """Threshold an occupancy grid and trace its outlines as clean polygons"""
+    # Grid is indexed [x, y]; trace it untransposed and read contour
+    # columns as (x, y) instead of materialising grid.T
+    binary = (grid > 1).view(np.uint8)  # basic occupancy threshold
+    if rasterio_shapes is not None:
+        return polygonize_binary(binary)
+    contours = trace_contours(binary)
+    if not contours:
+        return []
+
+    # Build every contour ring in one vectorized GEOS call; indices= groups
+    # coordinates into rings here, then each ring becomes a shell
+    coords = np.concatenate(contours) * resolution + (x_min, y_min)
+    ring_ids = np.repeat(np.arange(len(contours)), [len(c) for c in contours])
+    polys = shapely.polygons(shapely.linearrings(coords, indices=ring_ids))
+    polys = polys[shapely.area(polys) > MIN_POLYGON_AREA]
+    # **FIX APPLIED HERE**: Clean the polygons to prevent errors. Traced
+    # rings are almost always simple, so only repair the invalid ones
+    invalid = ~shapely.is_valid(polys)
+    if invalid.any():
+        polys[invalid] = shapely.buffer(polys[invalid], 0)
+    return list(polys[~shapely.is_empty(polys)])
 
-grid, _, _ = np.histogram2d(
-    floor_xy[:, 0], floor_xy[:, 1],
-    bins=(x_bins, y_bins)
-)
 
 # Threshold and contour extraction
-binary = grid.T > 1  # basic occupancy threshold
-contours = measure.find_contours(binary.astype(float), 0.5)
-
-polygons = []
-for contour in contours:
-    px = contour[:, 1] * resolution + x_min
-    py = contour[:, 0] * resolution + y_min
-    poly = Polygon(np.column_stack((px, py)))
-    if poly.area > 0.05:  # filter tiny noise
-        # **FIX APPLIED HERE**: Clean the polygon to prevent errors
-        clean_poly = poly.buffer(0)
-        if not clean_poly.is_empty:
-            polygons.append(clean_poly)
+polygons = grid_polygons(grid)
 
 # --- Safe floor extraction ---
 if polygons:
-    merged_floor = unary_union(polygons)
+    merged_floor = cascaded_union(polygons)
 else:
     print("[!] No valid floor polygons found — using convex hull fallback")
-    floor_threshold = np.percentile(points[:, 2], 5) + 0.05
+    floor_threshold = z_percentile(points[:, 2], 5) + 0.05
     floor_points = points[points[:, 2] < floor_threshold]
     floor_xy = floor_points[:, :2]
     merged_floor = MultiPoint(floor_xy).convex_hull
 
 # ======== STEP 4: EXTRACT WALL PROJECTIONS ========
-# Simple approach: slice by Z intervals
-z_values = points[:, 2]
-z_min, z_max = z_values.min(), z_values.max()
-
-wall_slices = []
-n_slices = 4  # number of vertical slices
-slice_thickness = (z_max - z_min) / n_slices
-
-for i in range(n_slices):
-    z_low = z_min + i * slice_thickness
-    z_high = z_low + slice_thickness
-    slice_points = points[(z_values >= z_low) & (z_values < z_high)]
-    if len(slice_points) < 500:
-        continue
-    wall_xy = slice_points[:, :2]
-    grid, _, _ = np.histogram2d(
-        wall_xy[:, 0], wall_xy[:, 1],
-        bins=(x_bins, y_bins)
-    )
-    binary = grid.T > 1
-    contours = measure.find_contours(binary.astype(float), 0.5)
-    wall_polys = []
-    for contour in contours:
-        px = contour[:, 1] * resolution + x_min
-        py = contour[:, 0] * resolution + y_min
-        poly = Polygon(np.column_stack((px, py)))
-        if poly.area > 0.05:
-            # **FIX APPLIED HERE**: Clean each polygon before adding to the list
-            clean_poly = poly.buffer(0)
-            if not clean_poly.is_empty:
-                 wall_polys.append(clean_poly)
-    if wall_polys:
-        # This line is now safe from the TopologyException
-        wall_slices.append((i, unary_union(wall_polys), slice_points))
+# Simple approach: slice by Z intervals. Slices are independent and the
+# heavy NumPy gathers and GEOS unions release the GIL, so threads
+# process them concurrently.
+
+# Bucket points by slice once (stable counting order) instead of one
+# boolean mask scan per slice; z == z_max falls outside every slice
+slice_id = np.floor((z_values - z_min) / slice_thickness).astype(np.intp)
+slice_order = np.argsort(slice_id, kind='stable')
+slice_starts = np.searchsorted(slice_id[slice_order], np.arange(n_slices + 1))
+
+
+def process_slice(i):
+    """Rasterize and outline one Z slice; None if it has too few points"""
+    start, stop = slice_starts[i], slice_starts[i + 1]
+    if stop - start < 500:
+        return None
+    slice_points = points[slice_order[start:stop]]
+    if layer_grids is not None:
+        grid = layer_grids[i + 1]
+    else:
+        grid = occupancy_grid(slice_points[:, :2])
+    wall_polys = grid_polygons(grid)
+    if not wall_polys:
+        return None
+    # This line is now safe from the TopologyException
+    return i, cascaded_union(wall_polys), slice_points
+
+
+with ThreadPoolExecutor(max_workers=min(n_slices, os.cpu_count() or 1)) as executor:
+    wall_slices = [r for r in executor.map(process_slice, range(n_slices)) if r is not None]
 
 print(f"[+] Extracted {len(wall_slices)} wall slices")
 
@@ -191,73 +390,73 @@ def draw_polygon(ax, poly, color="lightblue"):
         ax.fill(x, y, color=color, alpha=0.5)
 
 
+def style_axes(ax, title):
+    """Apply the shared title, scale and origin settings to an export plot"""
+    ax.set_title(title, fontsize=14, fontweight='bold')
+    ax.set_aspect('equal', 'box')
+    ax.set_xlim(left=0)  # Force X axis to start at 0
+    ax.set_ylim(bottom=0)  # Force Y axis to start at 0
+    ax.grid(True, alpha=0.3, linewidth=0.5)
+    ax.set_xlabel("X (m)", fontsize=12)
+    ax.set_ylabel("Y (m)", fontsize=12)
+
+
+def write_points_ply(path, pts):
+    """Write XYZ points as a binary PLY with float32 positions"""
+    # Tensor geometry keeps the float32 dtype on disk (half the bytes of
+    # legacy float64) and takes the array without a Vector3dVector copy
+    positions = o3d.core.Tensor(np.ascontiguousarray(pts, dtype=np.float32))
+    o3d.t.io.write_point_cloud(
+        path, o3d.t.geometry.PointCloud(positions), write_ascii=False
+    )
+
+
+EXPORT_DPI = 300  # pixel count (and savefig time) grows with dpi squared
+
 os.makedirs("exports", exist_ok=True)
 
-# Export floor separately
+# One figure serves every export; ax.cla() resets it between images
+# instead of paying figure construction per image
 fig, ax = plt.subplots(figsize=(10, 10))
+
+# Export floor separately
 draw_polygon(ax, merged_floor, color="skyblue")
-ax.set_title("Floor Plan (2D Projection) - Origin at (0,0)", fontsize=14, fontweight='bold')
-ax.set_aspect('equal', 'box')
-ax.set_xlim(left=0)  # Force X axis to start at 0
-ax.set_ylim(bottom=0)  # Force Y axis to start at 0
-ax.grid(True, alpha=0.3, linewidth=0.5)
-plt.xlabel("X (m)", fontsize=12)
-plt.ylabel("Y (m)", fontsize=12)
-plt.tight_layout()
-plt.savefig("exports/floor_plan.png", dpi=300)
+style_axes(ax, "Floor Plan (2D Projection) - Origin at (0,0)")
+fig.tight_layout()
+fig.savefig("exports/floor_plan.png", dpi=EXPORT_DPI)
 print("[+] Exported floor plan to exports/floor_plan.png")
-plt.close()
 
 # Export floor point cloud
-o3d.io.write_point_cloud(
-    "exports/floor_points.ply",
-    o3d.geometry.PointCloud(o3d.utility.Vector3dVector(floor_points))
-)
+write_points_ply("exports/floor_points.ply", floor_points)
 print("[+] Exported floor points to exports/floor_points.ply")
 
 # Export each wall slice separately
 colors = ["#FFB347", "#FF6961", "#77DD77", "#AEC6CF"]
 for idx, (i, wall_poly, slice_points) in enumerate(wall_slices):
     # Create individual visualization
-    fig, ax = plt.subplots(figsize=(10, 10))
+    ax.cla()
     draw_polygon(ax, wall_poly, color=colors[idx % len(colors)])
-    ax.set_title(f"Wall Slice {i + 1} (2D Projection) - Origin at (0,0)", fontsize=14, fontweight='bold')
-    ax.set_aspect('equal', 'box')
-    ax.set_xlim(left=0)  # Force X axis to start at 0
-    ax.set_ylim(bottom=0)  # Force Y axis to start at 0
-    ax.grid(True, alpha=0.3, linewidth=0.5)
-    plt.xlabel("X (m)", fontsize=12)
-    plt.ylabel("Y (m)", fontsize=12)
-    plt.tight_layout()
+    style_axes(ax, f"Wall Slice {i + 1} (2D Projection) - Origin at (0,0)")
+    fig.tight_layout()
 
     # Save individual PNG
     filename = f"exports/wall_slice_{i + 1}.png"
-    plt.savefig(filename, dpi=300)
+    fig.savefig(filename, dpi=EXPORT_DPI)
     print(f"[+] Exported wall slice {i + 1} to {filename}")
-    plt.close()
 
     # Save individual point cloud
     ply_filename = f"exports/wall_slice_{i + 1}_points.ply"
-    o3d.io.write_point_cloud(
-        ply_filename,
-        o3d.geometry.PointCloud(o3d.utility.Vector3dVector(slice_points))
-    )
+    write_points_ply(ply_filename, slice_points)
     print(f"[+] Exported wall slice {i + 1} points to {ply_filename}")
 
 # Optional: Create a combined overview for reference
-fig, ax = plt.subplots(figsize=(10, 10))
+ax.cla()
 draw_polygon(ax, merged_floor, color="skyblue")
 for idx, (i, wall_poly, _) in enumerate(wall_slices):
     draw_polygon(ax, wall_poly, color=colors[idx % len(colors)])
-ax.set_title("Combined Overview: Floor + All Wall Slices - Origin at (0,0)", fontsize=14, fontweight='bold')
-ax.set_aspect('equal', 'box')
-ax.set_xlim(left=0)  # Force X axis to start at 0
-ax.set_ylim(bottom=0)  # Force Y axis to start at 0
-ax.grid(True, alpha=0.3, linewidth=0.5)
-plt.xlabel("X (m)", fontsize=12)
-plt.ylabel("Y (m)", fontsize=12)
-plt.tight_layout()
-plt.savefig("exports/combined_overview.png", dpi=300)
+style_axes(ax, "Combined Overview: Floor + All Wall Slices - Origin at (0,0)")
+fig.tight_layout()
+fig.savefig("exports/combined_overview.png", dpi=EXPORT_DPI)
 print("[+] Exported combined overview to exports/combined_overview.png")
 plt.show()
 
@@ -36,13 +36,41 @@ async function readTextFile(filePath) {
   }
 }
 
+// Read tags: the tags.json snapshot plus changes still in the tags.jsonl journal
+async function readTags() {
+  const dataDir = path.join(__dirname, '..', 'data');
+  const snapshot = await readJSONFile(path.join(dataDir, 'tags.json'));
+  
+  let journal = '';
+  try {
+    journal = await fs.readFile(path.join(dataDir, 'tags.jsonl'), 'utf8');
+  } catch (error) {
+    return snapshot;  // No pending changes
+  }
+  
+  const byId = new Map((snapshot || []).map(tag => [tag.id, tag]));
+  for (const line of journal.split('\n')) {
+    let entry;
+    try {
+      entry = JSON.parse(line);
+    } catch (error) {
+      continue;  // Blank or torn line
+    }
+    if (entry._deleted !== undefined) {
+      byId.delete(entry._deleted);
+    } else {
+      byId.set(entry.id, entry);
+    }
+  }
+  return Array.from(byId.values());
+}
+
 // API Routes
 
 // Get all tags
 app.get('/api/tags', async (req, res) => {
   try {
-    const tagsPath = path.join(__dirname, '..', 'data', 'tags.json');
-    const tags = await readJSONFile(tagsPath);
+    const tags = await readTags();
     if (tags) {
       res.json(tags);
     } else {
@@ -110,8 +138,7 @@ app.get('/api/detections', async (req, res) => {
 // Get all available data (tags + detections combined)
 app.get('/api/all-data', async (req, res) => {
   try {
-    const tagsPath = path.join(__dirname, '..', 'data', 'tags.json');
-    const tags = await readJSONFile(tagsPath) || [];
+    const tags = await readTags() || [];
     
     const detectionsDir = path.join(__dirname, '..', 'data', 'evidence_detections');
     const files = await fs.readdir(detectionsDir);
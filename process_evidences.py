@@ -6,16 +6,27 @@ This script processes all images associated with tags and generates:
 - A consolidated summary of the scene for each tag
 """
 
-import json
+import asyncio
+import functools
+import io
+import os
 import sys
 import hashlib
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
+try:
+    from numba import njit
+except ImportError:  # optional accelerator, fall back to NumPy
+    njit = None
+
 try:
     from google import genai
-    from google.genai import types
+    from google.genai import errors, types
 except ImportError:
     print("❌ Error: google-genai package not installed.")
     print("   Install it with: pip install google-genai")
@@ -24,23 +35,110 @@ except ImportError:
 import config
 from src.core.tag_manager import TagManager
 from src.models.tag import Tag
+from src.utils.json_utils import JsonUtils
+
+DETECTION_MODEL = "gemini-2.5-flash"
+DETECTION_PROMPT = (
+    "Detect all of the prominent items in the image. "
+    "Return a JSON array of objects, each with 'label' (item name) and "
+    "'box_2d' ([ymin, xmin, ymax, xmax] normalized to 0-1000). "
+    "Only include clearly visible, prominent objects."
+)
+BATCH_DETECTION_PROMPT = (
+    "Detect all of the prominent items in each of the following images. "
+    "Return a JSON object {\"images\": [...]} with one entry per image, each "
+    "with 'index' (0-based position of the image in this request) and "
+    "'detections': an array of objects with 'label' (item name) and "
+    "'box_2d' ([ymin, xmin, ymax, xmax] normalized to 0-1000). "
+    "Only include clearly visible, prominent objects."
+)
+
+# Label fonts, tried in order; PIL's default is used if none exist
+FONT_CANDIDATES = [
+    "C:/Windows/Fonts/arial.ttf",
+    "/Library/Fonts/Arial.ttf",
+    "/System/Library/Fonts/Supplemental/Arial.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+]
+
+# Encoder settings for annotated images, by output extension
+ANNOTATED_SAVE_OPTIONS = {
+    ".jpg": {"quality": 85, "optimize": True, "progressive": True, "subsampling": 2},
+    ".jpeg": {"quality": 85, "optimize": True, "progressive": True, "subsampling": 2},
+    ".png": {"optimize": True, "compress_level": 6},
+    ".webp": {"quality": 85, "method": 6},
+}
+
+
+def _rescale_boxes_numpy(boxes: np.ndarray, height: int, width: int) -> np.ndarray:
+    """Scale (N, 4) [ymin, xmin, ymax, xmax] 0-1000 boxes to int32 [x1, y1, x2, y2] pixels."""
+    scale = np.array([height, width, height, width], dtype=np.float64) / 1000
+    return (boxes * scale).astype(np.int32)[:, [1, 0, 3, 2]]
+
+
+if njit is not None:
+    @njit(cache=True)
+    def _rescale_boxes(boxes, height, width):
+        """Compiled equivalent of _rescale_boxes_numpy, fused into one loop."""
+        sy = height / 1000.0
+        sx = width / 1000.0
+        out = np.empty(boxes.shape, dtype=np.int32)
+        for i in range(boxes.shape[0]):
+            out[i, 0] = np.int32(boxes[i, 1] * sx)
+            out[i, 1] = np.int32(boxes[i, 0] * sy)
+            out[i, 2] = np.int32(boxes[i, 3] * sx)
+            out[i, 3] = np.int32(boxes[i, 2] * sy)
+        return out
+else:
+    _rescale_boxes = _rescale_boxes_numpy
+
+
+@functools.lru_cache(maxsize=4096)
+def _color_for(name: str) -> Tuple[int, int, int]:
+    """Map a lowercase label to a bright RGB color, computed once per label."""
+    # Use hash to generate consistent color for same object name
+    r, g, b = hashlib.blake2s(name.encode(), digest_size=3).digest()
+    
+    # Ensure minimum brightness for visibility
+    r = max(r, 50)
+    g = max(g, 50)
+    b = max(b, 50)
+    
+    # Normalize to ensure good contrast
+    max_val = max(r, g, b)
+    if max_val < 128:
+        scale = 255 / max_val
+        r = min(int(r * scale), 255)
+        g = min(int(g * scale), 255)
+        b = min(int(b * scale), 255)
+    
+    return (r, g, b)
 
 
 class EvidenceProcessor:
     """Processes evidence images using Gemini API for object detection."""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None,
+                 max_concurrency: int = config.GEMINI_MAX_CONCURRENCY,
+                 use_cache: bool = True,
+                 max_workers: int = config.PHOTO_WORKERS,
+                 batch_size: int = config.GEMINI_BATCH_SIZE,
+                 output_format: Optional[str] = None):
         """Initialize the evidence processor.
         
         Args:
             api_key: Google Gemini API key. If None, will try to get from environment.
+            max_concurrency: Maximum number of Gemini requests in flight at once
+            use_cache: Reuse stored responses for photos already processed
+            max_workers: Threads used for image decoding, drawing and saving
+            batch_size: Photos sent per Gemini request; 1 sends each photo alone
+            output_format: Extension for annotated images (e.g. "webp"); None keeps the original
         """
         try:
             if api_key:
                 self.client = genai.Client(api_key=api_key)
             else:
                 # Try to get from environment variable
-                import os
                 api_key = os.getenv("GOOGLE_API_KEY")
                 if not api_key:
                     raise ValueError("API key not provided and GOOGLE_API_KEY not set")
@@ -50,97 +148,370 @@ class EvidenceProcessor:
             print("   Make sure you have a valid Google API key.")
             sys.exit(1)
         
+        self.max_concurrency = max_concurrency
+        self._sem: Optional[asyncio.Semaphore] = None  # bound to the running loop
+        self.max_workers = max_workers
+        self.batch_size = max(1, batch_size)
+        self.output_format = output_format.lower().lstrip(".") if output_format else None
+        self._executor: Optional[ThreadPoolExecutor] = None
         self.tag_manager = TagManager()
         self.detections_dir = Path("data/evidence_detections")
         self.detections_dir.mkdir(parents=True, exist_ok=True)
         self.post_process_dir = Path("data/post_process")
         self.post_process_dir.mkdir(parents=True, exist_ok=True)
+        self.use_cache = use_cache
+        self.cache_dir = self.detections_dir / ".cache"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._detection_config = types.GenerateContentConfig(
+            response_mime_type="application/json"
+        )
+        self._font = self._load_font()
     
-    def detect_objects_in_image(self, image_path: Path) -> Dict:
+    async def _generate_content(self, contents: list,
+                                config_obj: types.GenerateContentConfig):
+        """Call Gemini under the concurrency limit, retrying transient failures.
+        
+        Rate limits (HTTP 429), server errors and timeouts are retried with
+        exponential backoff; anything else is raised immediately.
+        """
+        delay = 1.0
+        for attempt in range(config.GEMINI_MAX_RETRIES):
+            try:
+                async with self._sem:
+                    return await self.client.aio.models.generate_content(
+                        model=DETECTION_MODEL,
+                        contents=contents,
+                        config=config_obj
+                    )
+            except (errors.APIError, asyncio.TimeoutError) as e:
+                code = getattr(e, "code", None) or 0
+                retriable = isinstance(e, asyncio.TimeoutError) or code == 429 or code >= 500
+                if not retriable or attempt == config.GEMINI_MAX_RETRIES - 1:
+                    raise
+                print(f"  ⏳ Gemini request failed ({e}), retrying in {delay:.0f}s...")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60.0)
+    
+    async def _run_blocking(self, func, *args):
+        """Run blocking image work on the worker pool.
+        
+        PIL releases the GIL while decoding, drawing and encoding, so
+        photos are handled in parallel while requests are in flight.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args))
+    
+    @staticmethod
+    def _read_image(image_path: Path, image_bytes: Optional[bytes] = None,
+                    digest: Optional[bytes] = None) -> Tuple[bytes, Image.Image]:
+        """Decode an image file, reading and hashing it unless already done.
+        
+        Args:
+            image_path: Path to the image file
+            image_bytes: File content, if the caller already read it
+            digest: Content digest of image_bytes, if already computed
+            
+        Returns:
+            Tuple of (content digest, decoded PIL image)
+        """
+        if image_bytes is None:
+            image_bytes = image_path.read_bytes()
+        if digest is None:
+            digest = EvidenceProcessor._content_digest(image_bytes)
+        image = Image.open(io.BytesIO(image_bytes))
+        image.load()
+        return digest, image
+    
+    async def detect_objects_in_image(self, image_path: Path,
+                                      loaded: Optional[Tuple[bytes, Image.Image]] = None) -> Dict:
         """Detect objects in a single image using Gemini API.
         
         Args:
             image_path: Path to the image file
+            loaded: Content digest and decoded image, if the caller already read them
             
         Returns:
             Dictionary containing detections and metadata
         """
         try:
             # Open and validate image
-            image = Image.open(image_path)
+            if loaded is None:
+                loaded = await self._run_blocking(self._read_image, image_path)
+            digest, image = loaded
             width, height = image.size
             
-            prompt = (
-                "Detect all of the prominent items in the image. "
-                "Return a JSON array of objects, each with 'label' (item name) and "
-                "'box_2d' ([ymin, xmin, ymax, xmax] normalized to 0-1000). "
-                "Only include clearly visible, prominent objects."
-            )
+            # Responses are cached by content, so renamed or re-run photos
+            # skip the API; model and prompt are part of the key
+            cache_file = self.cache_dir / f"{self._cache_key(digest)}.json"
+            bounding_boxes = self._load_cached_response(cache_file) if self.use_cache else None
+            if bounding_boxes is not None:
+                print(f"  ♻️  Using cached detections: {image_path.name}")
+            else:
+                print(f"  🔍 Processing: {image_path.name}...")
+                upload = await self._run_blocking(self._upload_copy, image)
+                response = await self._generate_content(
+                    [upload, DETECTION_PROMPT], self._detection_config
+                )
+                text_part = self._response_text(response)
+                
+                # Parse response JSON; a fresh response always replaces the
+                # stored one, so --no-cache also repairs stale entries
+                bounding_boxes = JsonUtils.loads(text_part)
+                self._store_cached_response(cache_file, text_part.encode("utf-8"))
             
-            config_obj = types.GenerateContentConfig(
-                response_mime_type="application/json"
-            )
+            return self._build_result(image_path, width, height, bounding_boxes)
             
-            print(f"  🔍 Processing: {image_path.name}...")
-            response = self.client.models.generate_content(
-                model="gemini-2.5-flash",
-                contents=[image, prompt],
-                config=config_obj
-            )
+        except Exception as e:
+            print(f"  ❌ Error processing {image_path.name}: {e}")
+            return self._error_result(image_path, str(e))
+    
+    async def detect_objects_in_images(self, image_paths: List[Path],
+                                       loaded: Optional[List[Tuple[bytes, Image.Image]]] = None
+                                       ) -> List[Dict]:
+        """Detect objects in several images with a single Gemini request.
+        
+        Images with a cached response are not sent again; the rest share
+        one request and the per-image results are matched back by index.
+        
+        Args:
+            image_paths: Paths to the image files
+            loaded: Content digest and decoded image per path, if already read
             
-            # Extract JSON text from response
-            # Response structure: response.candidates[0].content.parts[0].text
-            if not response.candidates or len(response.candidates) == 0:
-                raise ValueError("No candidates in response")
-            
-            candidate = response.candidates[0]
-            if not candidate.content or not candidate.content.parts:
-                raise ValueError("No content parts in response")
-            
-            text_part = candidate.content.parts[0].text
-            if not text_part:
-                raise ValueError("No text in response")
-            
-            # Parse response JSON
-            bounding_boxes = json.loads(text_part)
-            
-            # Convert normalized coordinates to absolute pixel coordinates
-            converted_bounding_boxes = []
-            for detection in bounding_boxes:
-                if "box_2d" in detection and len(detection["box_2d"]) == 4:
-                    y1_norm, x1_norm, y2_norm, x2_norm = detection["box_2d"]
-                    
-                    abs_y1 = int(y1_norm / 1000 * height)
-                    abs_x1 = int(x1_norm / 1000 * width)
-                    abs_y2 = int(y2_norm / 1000 * height)
-                    abs_x2 = int(x2_norm / 1000 * width)
-                    
-                    converted_detection = {
-                        "label": detection.get("label", "unknown"),
-                        "box_2d_absolute": [abs_x1, abs_y1, abs_x2, abs_y2],
-                        "box_2d_normalized": detection["box_2d"],
-                        "confidence": detection.get("confidence", 1.0)
-                    }
-                    converted_bounding_boxes.append(converted_detection)
-            
-            result = {
-                "image_path": str(image_path),
-                "image_size": {"width": width, "height": height},
-                "detections": converted_bounding_boxes,
-                "detection_count": len(converted_bounding_boxes)
-            }
+        Returns:
+            One detection dictionary per image, in the same order
+        """
+        if loaded is None:
+            try:
+                loaded = await asyncio.gather(
+                    *(self._run_blocking(self._read_image, p) for p in image_paths)
+                )
+            except Exception as e:
+                print(f"  ❌ Error reading images: {e}")
+                return [self._error_result(p, str(e)) for p in image_paths]
+        
+        sizes = [image.size for _, image in loaded]
+        cache_files = [
+            self.cache_dir / f"{self._cache_key(digest, BATCH_DETECTION_PROMPT)}.json"
+            for digest, _ in loaded
+        ]
+        
+        boxes_per_image: List[Optional[List[Dict]]] = [None] * len(image_paths)
+        pending = []
+        for i, cache_file in enumerate(cache_files):
+            if self.use_cache:
+                boxes_per_image[i] = self._load_cached_response(cache_file)
+            if boxes_per_image[i] is not None:
+                print(f"  ♻️  Using cached detections: {image_paths[i].name}")
+            else:
+                pending.append(i)
+        
+        error = None
+        if pending:
+            print(f"  🔍 Processing {len(pending)} image(s) in one request...")
+            try:
+                images = await asyncio.gather(
+                    *(self._run_blocking(self._upload_copy, loaded[i][1]) for i in pending)
+                )
+                response = await self._generate_content(
+                    [BATCH_DETECTION_PROMPT, *images], self._detection_config
+                )
+                data = JsonUtils.loads(self._response_text(response))
+                
+                # Demultiplex by the index Gemini echoes back
+                by_index = {
+                    entry.get("index"): entry.get("detections", [])
+                    for entry in data.get("images", [])
+                }
+                for position, i in enumerate(pending):
+                    if position in by_index:
+                        boxes_per_image[i] = by_index[position]
+                        self._store_cached_response(
+                            cache_files[i], JsonUtils.dumps(by_index[position])
+                        )
+            except Exception as e:
+                print(f"  ❌ Error processing batch: {e}")
+                error = str(e)
+        
+        results = []
+        for image_path, (width, height), bounding_boxes in zip(image_paths, sizes, boxes_per_image):
+            if bounding_boxes is None:
+                results.append(self._error_result(image_path, error or "Missing from batch response"))
+            else:
+                results.append(self._build_result(image_path, width, height, bounding_boxes))
+        return results
+    
+    @staticmethod
+    def _upload_copy(image: Image.Image) -> Image.Image:
+        """Return a copy of an image scaled down to the configured upload size.
+        
+        Boxes come back normalized to 0-1000, so a downscaled upload loses
+        no accuracy; the full-resolution original is kept for annotation.
+        """
+        upload = image.copy()
+        upload.thumbnail(
+            (config.GEMINI_MAX_IMAGE_EDGE, config.GEMINI_MAX_IMAGE_EDGE),
+            Image.LANCZOS
+        )
+        return upload
+    
+    @staticmethod
+    def _response_text(response) -> str:
+        """Extract the JSON text from a Gemini response.
+        
+        Args:
+            response: Response returned by generate_content
             
-            print(f"  ✅ Found {len(converted_bounding_boxes)} objects")
-            return result
+        Returns:
+            Text of the first candidate's first part
+        """
+        # Response structure: response.candidates[0].content.parts[0].text
+        if not response.candidates or len(response.candidates) == 0:
+            raise ValueError("No candidates in response")
+        
+        candidate = response.candidates[0]
+        if not candidate.content or not candidate.content.parts:
+            raise ValueError("No content parts in response")
+        
+        text_part = candidate.content.parts[0].text
+        if not text_part:
+            raise ValueError("No text in response")
+        return text_part
+    
+    def _build_result(self, image_path: Path, width: int, height: int,
+                      bounding_boxes: List[Dict]) -> Dict:
+        """Build the detection result for one image.
+        
+        Args:
+            image_path: Path to the image file
+            width: Original image width in pixels
+            height: Original image height in pixels
+            bounding_boxes: Detections as returned by Gemini
             
-        except Exception as e:
-            print(f"  ❌ Error processing {image_path.name}: {e}")
-            return {
-                "image_path": str(image_path),
-                "error": str(e),
-                "detections": [],
-                "detection_count": 0
+        Returns:
+            Dictionary containing detections and metadata
+        """
+        # Convert normalized coordinates to absolute pixel coordinates
+        converted_bounding_boxes = self._to_absolute_boxes(bounding_boxes, width, height)
+        
+        print(f"  ✅ Found {len(converted_bounding_boxes)} objects in {image_path.name}")
+        return {
+            "image_path": str(image_path),
+            "image_size": {"width": width, "height": height},
+            "detections": converted_bounding_boxes,
+            "detection_count": len(converted_bounding_boxes)
+        }
+    
+    @staticmethod
+    def _error_result(image_path: Path, error: str) -> Dict:
+        """Build the result recorded for an image that could not be processed."""
+        return {
+            "image_path": str(image_path),
+            "error": error,
+            "detections": [],
+            "detection_count": 0
+        }
+    
+    @staticmethod
+    def _to_absolute_boxes(bounding_boxes: List[Dict], width: int, height: int) -> List[Dict]:
+        """Convert Gemini's normalized boxes to absolute pixel coordinates.
+        
+        Args:
+            bounding_boxes: Detections with 'box_2d' as [ymin, xmin, ymax, xmax] in 0-1000
+            width: Image width in pixels
+            height: Image height in pixels
+            
+        Returns:
+            Detections with 'box_2d_absolute' as [x1, y1, x2, y2]
+        """
+        valid = [d for d in bounding_boxes if len(d.get("box_2d", [])) == 4]
+        if not valid:
+            return []
+        
+        # Scale all boxes in one pass, then reorder to [x1, y1, x2, y2]
+        boxes = np.array([d["box_2d"] for d in valid], dtype=np.float64)
+        abs_boxes = _rescale_boxes(boxes, height, width).tolist()
+        
+        return [
+            {
+                "label": detection.get("label", "unknown"),
+                "box_2d_absolute": box,
+                "box_2d_normalized": detection["box_2d"],
+                "confidence": detection.get("confidence", 1.0)
             }
+            for detection, box in zip(valid, abs_boxes)
+        ]
+    
+    @staticmethod
+    def _content_digest(image_bytes: bytes) -> bytes:
+        """Hash an image file's content once for deduplication and cache keys.
+        
+        Args:
+            image_bytes: Raw bytes of the image file
+            
+        Returns:
+            SHA-256 digest of the content
+        """
+        return hashlib.sha256(image_bytes).digest()
+    
+    @staticmethod
+    def _cache_key(content_digest: bytes, prompt: str = DETECTION_PROMPT) -> str:
+        """Build the response cache key for an image.
+        
+        Args:
+            content_digest: Digest of the image file from _content_digest
+            prompt: Prompt the response was produced with
+            
+        Returns:
+            Hex digest covering model, prompt, upload size and image content
+        """
+        digest = hashlib.sha256()
+        digest.update(DETECTION_MODEL.encode())
+        digest.update(prompt.encode())
+        digest.update(str(config.GEMINI_MAX_IMAGE_EDGE).encode())
+        digest.update(content_digest)
+        return digest.hexdigest()
+    
+    @staticmethod
+    def _load_cached_response(cache_file: Path) -> Optional[List[Dict]]:
+        """Read a cached detection response.
+        
+        An entry that fails to parse, such as one cut short by an
+        interrupted write, is deleted and counts as a miss.
+        
+        Args:
+            cache_file: Cache entry for the image and prompt
+            
+        Returns:
+            Parsed detections, or None if there is no usable entry
+        """
+        try:
+            return JsonUtils.loads(cache_file.read_bytes())
+        except FileNotFoundError:
+            return None
+        except ValueError as e:  # JSON decode errors of both json and orjson
+            print(f"  ⚠️  Discarding unreadable cache entry {cache_file.name}: {e}")
+            cache_file.unlink(missing_ok=True)
+            return None
+    
+    @staticmethod
+    def _store_cached_response(cache_file: Path, payload: bytes) -> None:
+        """Write a cache entry atomically, replacing any existing one.
+        
+        The payload goes to a temporary file that is renamed into place,
+        so readers never see a partial entry. A failed write only costs
+        the cache, not the detection result.
+        
+        Args:
+            cache_file: Cache entry for the image and prompt
+            payload: Response JSON as UTF-8 bytes
+        """
+        tmp_path = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+        try:
+            tmp_path.write_bytes(payload)
+            os.replace(tmp_path, cache_file)
+        except OSError as e:
+            print(f"  ⚠️  Could not cache detections: {e}")
+            tmp_path.unlink(missing_ok=True)
     
     def _get_color_for_object(self, object_name: str) -> Tuple[int, int, int]:
         """Generate a consistent color for an object name.
@@ -151,61 +522,52 @@ class EvidenceProcessor:
         Returns:
             RGB tuple (r, g, b) with values 0-255
         """
-        # Use hash to generate consistent color for same object name
-        hash_obj = hashlib.md5(object_name.lower().encode())
-        hash_int = int(hash_obj.hexdigest(), 16)
-        
-        # Generate bright, distinct colors
-        r = (hash_int & 0xFF0000) >> 16
-        g = (hash_int & 0x00FF00) >> 8
-        b = hash_int & 0x0000FF
-        
-        # Ensure minimum brightness for visibility
-        r = max(r, 50)
-        g = max(g, 50)
-        b = max(b, 50)
-        
-        # Normalize to ensure good contrast
-        max_val = max(r, g, b)
-        if max_val < 128:
-            scale = 255 / max_val
-            r = min(int(r * scale), 255)
-            g = min(int(g * scale), 255)
-            b = min(int(b * scale), 255)
+        return _color_for(object_name.lower())
+    
+    @staticmethod
+    def _load_font() -> ImageFont.ImageFont:
+        """Load the label font, falling back to PIL's default.
         
-        return (r, g, b)
+        Returns:
+            Font used for bounding box labels
+        """
+        # Probe candidates instead of letting truetype() raise for each miss
+        for candidate in FONT_CANDIDATES:
+            if Path(candidate).exists():
+                try:
+                    return ImageFont.truetype(candidate, 16)
+                except OSError:
+                    continue  # Present but unreadable
+        return ImageFont.load_default()
     
-    def _draw_bounding_boxes(self, image_path: Path, detections: List[Dict]) -> Image.Image:
-        """Draw colored bounding boxes on an image.
+    def _draw_bounding_boxes(self, image: Image.Image, detections: List[Dict]) -> Image.Image:
+        """Draw colored bounding boxes on a copy of an image.
         
         Args:
-            image_path: Path to the original image
+            image: Decoded original image (left unchanged)
             detections: List of detection dictionaries with bounding boxes
             
         Returns:
             PIL Image with bounding boxes drawn
         """
-        # Open image
-        image = Image.open(image_path).convert("RGB")
-        draw = ImageDraw.Draw(image)
+        font = self._font
         
-        # Try to load a font, fallback to default if not available
-        try:
-            font = ImageFont.truetype("arial.ttf", 16)
-        except:
-            try:
-                font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 16)
-            except:
-                font = ImageFont.load_default()
+        boxes = [
+            (detection.get("label", "unknown"), detection.get("box_2d_absolute", []))
+            for detection in detections
+        ]
+        boxes = [(label, box) for label, box in boxes if len(box) == 4]
+        
+        # Draw all semi-transparent fills on one overlay and composite once
+        overlay = Image.new('RGBA', image.size, (0, 0, 0, 0))
+        overlay_draw = ImageDraw.Draw(overlay)
+        for label, box in boxes:
+            overlay_draw.rectangle(box, fill=(*self._get_color_for_object(label), 30))
+        image = Image.alpha_composite(image.convert('RGBA'), overlay).convert('RGB')
+        draw = ImageDraw.Draw(image)
         
         # Draw each bounding box
-        for detection in detections:
-            label = detection.get("label", "unknown")
-            box = detection.get("box_2d_absolute", [])
-            
-            if len(box) != 4:
-                continue
-            
+        for label, box in boxes:
             x1, y1, x2, y2 = box
             
             # Get color for this object
@@ -214,13 +576,6 @@ class EvidenceProcessor:
             # Draw rectangle (outline)
             draw.rectangle([x1, y1, x2, y2], outline=color, width=3)
             
-            # Draw semi-transparent fill
-            overlay = Image.new('RGBA', image.size, (0, 0, 0, 0))
-            overlay_draw = ImageDraw.Draw(overlay)
-            overlay_draw.rectangle([x1, y1, x2, y2], fill=(*color, 30))
-            image = Image.alpha_composite(image.convert('RGBA'), overlay).convert('RGB')
-            draw = ImageDraw.Draw(image)
-            
             # Draw label background
             label_text = f"{label}"
             bbox = draw.textbbox((0, 0), label_text, font=font)
@@ -242,13 +597,15 @@ class EvidenceProcessor:
         
         return image
     
-    def save_annotated_image(self, tag_id: str, image_path: Path, detections: List[Dict]) -> Optional[Path]:
+    def save_annotated_image(self, tag_id: str, image_path: Path, detections: List[Dict],
+                             image: Optional[Image.Image] = None) -> Optional[Path]:
         """Save an annotated image with bounding boxes.
         
         Args:
             tag_id: ID of the tag
             image_path: Path to the original image
             detections: List of detection dictionaries
+            image: Already decoded original image; opened from image_path if None
             
         Returns:
             Path to the saved annotated image, or None if error
@@ -259,15 +616,17 @@ class EvidenceProcessor:
             tag_post_dir.mkdir(parents=True, exist_ok=True)
             
             # Draw bounding boxes
-            annotated_image = self._draw_bounding_boxes(image_path, detections)
+            if image is None:
+                image = Image.open(image_path)
+            annotated_image = self._draw_bounding_boxes(image, detections)
             
             # Generate output filename
             image_name = image_path.stem
-            image_ext = image_path.suffix
+            image_ext = f".{self.output_format}" if self.output_format else image_path.suffix
             output_path = tag_post_dir / f"{image_name}_annotated{image_ext}"
             
             # Save annotated image
-            annotated_image.save(output_path, quality=95)
+            annotated_image.save(output_path, **ANNOTATED_SAVE_OPTIONS.get(image_ext.lower(), {}))
             
             return output_path
             
@@ -275,7 +634,7 @@ class EvidenceProcessor:
             print(f"  ⚠️  Error creating annotated image: {e}")
             return None
     
-    def process_tag_photos(self, tag: Tag) -> Dict:
+    async def process_tag_photos(self, tag: Tag) -> Dict:
         """Process all photos for a specific tag.
         
         Args:
@@ -303,67 +662,223 @@ class EvidenceProcessor:
         
         print(f"  📸 Found {len(tag.photos)} photo(s)")
         
-        # Process each photo
-        image_detections = []
-        all_detected_objects = []
-        
-        for photo_path_str in tag.photos:
-            photo_path = Path(photo_path_str)
-            
-            if not photo_path.exists():
-                print(f"  ⚠️  Photo not found: {photo_path}")
-                image_detections.append({
+        # Validate photos locally and drop repeated content before spending requests
+        photo_paths = [Path(p) for p in tag.photos]
+        checks = await asyncio.gather(
+            *(self._run_blocking(self._preflight_photo, p) for p in photo_paths)
+        )
+        image_detections: List[Optional[Dict]] = [None] * len(photo_paths)
+        first_by_digest: Dict[bytes, Path] = {}
+        to_process = []
+        for i, (photo_path, (_, digest, error)) in enumerate(zip(photo_paths, checks)):
+            if error:
+                print(f"  ⚠️  Skipping {photo_path.name}: {error}")
+                image_detections[i] = self._error_result(photo_path, error)
+            elif digest in first_by_digest:
+                print(f"  ♻️  Skipping {photo_path.name}: same content as {first_by_digest[digest].name}")
+                image_detections[i] = {
                     "image_path": str(photo_path),
-                    "error": "File not found",
+                    "duplicate_of": str(first_by_digest[digest]),
                     "detections": [],
                     "detection_count": 0
-                })
-                continue
-            
-            # Detect objects in image
-            detection_result = self.detect_objects_in_image(photo_path)
-            image_detections.append(detection_result)
-            
-            # Create annotated image with bounding boxes
-            if "error" not in detection_result and detection_result.get("detections"):
-                annotated_path = self.save_annotated_image(
-                    tag.id,
-                    photo_path,
-                    detection_result.get("detections", [])
+                }
+            else:
+                first_by_digest[digest] = photo_path
+                to_process.append(i)
+        
+        # Process remaining photos concurrently (bounded by the semaphore and pool),
+        # decoding the bytes and digests preflight already read
+        unique_paths = [photo_paths[i] for i in to_process]
+        preflighted = [checks[i][:2] for i in to_process]
+        if self.batch_size > 1:
+            batches = await asyncio.gather(*(
+                self._process_photo_batch(
+                    unique_paths[i:i + self.batch_size], tag.id,
+                    preflighted[i:i + self.batch_size]
                 )
-                if annotated_path:
-                    detection_result["annotated_image_path"] = str(annotated_path)
-                    print(f"  🎨 Saved annotated image: {annotated_path.name}")
-            
-            # Collect all detected objects for summary
-            for det in detection_result.get("detections", []):
-                all_detected_objects.append(det.get("label", "unknown"))
+                for i in range(0, len(unique_paths), self.batch_size)
+            ))
+            processed = [result for batch in batches for result in batch]
+        else:
+            processed = await asyncio.gather(*(
+                self._process_single_photo(p, tag.id, pre)
+                for p, pre in zip(unique_paths, preflighted)
+            ))
+        for i, result in zip(to_process, processed):
+            image_detections[i] = result
+        
+        # Count detected objects for summary
+        object_counts = Counter()
+        for detection_result in image_detections:
+            object_counts.update(
+                det.get("label", "unknown") for det in detection_result.get("detections", [])
+            )
         
         # Generate consolidated summary
-        summary = self._generate_summary(tag, image_detections, all_detected_objects)
+        summary = self._generate_summary(tag, image_detections, object_counts)
         
         result = {
             "tag_id": tag.id,
             "tag_title": tag.title,
             "tag_description": tag.description,
             "tag_coords": tag.coords,
-            "photos_processed": len([d for d in image_detections if "error" not in d]),
-            "total_detections": sum(d.get("detection_count", 0) for d in image_detections),
+            "photos_processed": len([
+                d for d in image_detections if "error" not in d and "duplicate_of" not in d
+            ]),
+            "total_detections": sum(object_counts.values()),
             "image_detections": image_detections,
             "summary": summary,
-            "detected_objects": list(set(all_detected_objects))  # Unique objects
+            "detected_objects": list(object_counts)  # Unique objects
         }
         
         return result
     
+    @staticmethod
+    def _preflight_photo(photo_path: Path) -> Tuple[Optional[bytes], Optional[bytes], Optional[str]]:
+        """Check that a photo is a readable image and hash its content.
+        
+        The file is read once; its bytes and digest are handed on so
+        decoding and the response cache key need no second read or hash.
+        
+        Args:
+            photo_path: Path to the photo
+            
+        Returns:
+            Tuple of (file bytes, content digest, None) for a valid photo,
+            or (None, None, error)
+        """
+        if not photo_path.exists():
+            return None, None, "File not found"
+        try:
+            image_bytes = photo_path.read_bytes()
+            # verify() checks the file structure without decoding the pixels
+            with Image.open(io.BytesIO(image_bytes)) as image:
+                image.verify()
+            return image_bytes, EvidenceProcessor._content_digest(image_bytes), None
+        except Exception as e:
+            return None, None, f"Invalid image: {e}"
+    
+    async def _process_single_photo(self, photo_path: Path, tag_id: str,
+                                    preflighted: Optional[Tuple[bytes, bytes]] = None) -> Dict:
+        """Detect objects in one photo and save its annotated copy.
+        
+        Args:
+            photo_path: Path to the photo
+            tag_id: ID of the tag the photo belongs to
+            preflighted: File bytes and content digest from _preflight_photo
+            
+        Returns:
+            Detection result dictionary, including the annotated image path
+        """
+        if preflighted is None and not photo_path.exists():
+            print(f"  ⚠️  Photo not found: {photo_path}")
+            return self._error_result(photo_path, "File not found")
+        
+        # Decode once; detection and annotation share the same pixels
+        try:
+            loaded = await self._run_blocking(self._read_image, photo_path, *(preflighted or ()))
+        except Exception as e:
+            print(f"  ❌ Error processing {photo_path.name}: {e}")
+            return self._error_result(photo_path, str(e))
+        
+        image = loaded[1]
+        try:
+            detection_result = await self.detect_objects_in_image(photo_path, loaded)
+            return await self._annotate_photo(detection_result, photo_path, tag_id, image)
+        finally:
+            image.close()
+    
+    async def _process_photo_batch(self, photo_paths: List[Path], tag_id: str,
+                                   preflighted: Optional[List[Tuple[bytes, bytes]]] = None
+                                   ) -> List[Dict]:
+        """Detect objects in a group of photos with one request and annotate them.
+        
+        Args:
+            photo_paths: Paths to the photos
+            tag_id: ID of the tag the photos belong to
+            preflighted: File bytes and content digest per photo from _preflight_photo
+            
+        Returns:
+            Detection result dictionaries, in the same order as photo_paths
+        """
+        results: List[Optional[Dict]] = [None] * len(photo_paths)
+        
+        # Decode each photo once; detection and annotation share the pixels
+        async def read(photo_path: Path, pre):
+            try:
+                return await self._run_blocking(self._read_image, photo_path, *(pre or ()))
+            except Exception as e:
+                return e
+        
+        if preflighted is None:
+            preflighted = [None] * len(photo_paths)
+        found = []
+        loaded = []
+        for i, (photo_path, pre, outcome) in enumerate(zip(
+                photo_paths, preflighted,
+                await asyncio.gather(*(read(p, pre) for p, pre in zip(photo_paths, preflighted))))):
+            if pre is None and not photo_path.exists():
+                print(f"  ⚠️  Photo not found: {photo_path}")
+                results[i] = self._error_result(photo_path, "File not found")
+            elif isinstance(outcome, Exception):
+                print(f"  ❌ Error processing {photo_path.name}: {outcome}")
+                results[i] = self._error_result(photo_path, str(outcome))
+            else:
+                found.append(i)
+                loaded.append(outcome)
+        
+        if found:
+            try:
+                detections = await self.detect_objects_in_images(
+                    [photo_paths[i] for i in found], loaded
+                )
+                annotated = await asyncio.gather(*(
+                    self._annotate_photo(result, photo_paths[i], tag_id, image)
+                    for i, result, (_, image) in zip(found, detections, loaded)
+                ))
+                for i, result in zip(found, annotated):
+                    results[i] = result
+            finally:
+                for _, image in loaded:
+                    image.close()
+        return results
+    
+    async def _annotate_photo(self, detection_result: Dict, photo_path: Path,
+                              tag_id: str, image: Image.Image) -> Dict:
+        """Save the annotated copy of a photo and record its path.
+        
+        Args:
+            detection_result: Detection result for the photo
+            photo_path: Path to the photo
+            tag_id: ID of the tag the photo belongs to
+            image: Decoded original photo
+            
+        Returns:
+            The detection result, including the annotated image path
+        """
+        # Create annotated image with bounding boxes
+        if "error" not in detection_result and detection_result.get("detections"):
+            annotated_path = await self._run_blocking(
+                self.save_annotated_image,
+                tag_id,
+                photo_path,
+                detection_result["detections"],
+                image
+            )
+            if annotated_path:
+                detection_result["annotated_image_path"] = str(annotated_path)
+                print(f"  🎨 Saved annotated image: {annotated_path.name}")
+        
+        return detection_result
+    
     def _generate_summary(self, tag: Tag, image_detections: List[Dict], 
-                         all_objects: List[str]) -> str:
+                         object_counts: Counter) -> str:
         """Generate a consolidated summary of the scene for a tag.
         
         Args:
             tag: The tag being processed
             image_detections: List of detection results for each image
-            all_objects: List of all detected object labels
+            object_counts: Number of detections per object label
             
         Returns:
             Summary text
@@ -371,10 +886,6 @@ class EvidenceProcessor:
         if not image_detections:
             return "No images were processed."
         
-        # Count object occurrences
-        from collections import Counter
-        object_counts = Counter(all_objects)
-        
         # Build summary
         summary_parts = [
             f"Evidence Analysis for Tag: {tag.title}",
@@ -382,7 +893,7 @@ class EvidenceProcessor:
             f"Description: {tag.description}",
             "",
             f"Images Processed: {len(image_detections)}",
-            f"Total Objects Detected: {len(all_objects)}",
+            f"Total Objects Detected: {sum(object_counts.values())}",
             f"Unique Object Types: {len(object_counts)}",
             "",
             "Detected Objects:"
@@ -401,6 +912,8 @@ class EvidenceProcessor:
             
             if "error" in img_det:
                 summary_parts.append(f"    Error: {img_det['error']}")
+            elif "duplicate_of" in img_det:
+                summary_parts.append(f"    Duplicate of: {Path(img_det['duplicate_of']).name}")
             else:
                 det_count = img_det.get("detection_count", 0)
                 summary_parts.append(f"    Objects detected: {det_count}")
@@ -422,8 +935,8 @@ class EvidenceProcessor:
         output_file = self.detections_dir / f"{tag_id}_detections.json"
         
         try:
-            with open(output_file, "w", encoding="utf-8") as f:
-                json.dump(detection_data, f, indent=2)
+            # Read by the web app, not by hand, so written without indentation
+            JsonUtils.write(output_file, detection_data)
             print(f"  💾 Saved detections to: {output_file}")
         except Exception as e:
             print(f"  ❌ Error saving detections: {e}")
@@ -444,6 +957,51 @@ class EvidenceProcessor:
         except Exception as e:
             print(f"  ❌ Error saving summary: {e}")
     
+    async def _process_tag(self, tag: Tag):
+        """Process, save and report a single tag.
+        
+        Args:
+            tag: The tag to process
+        """
+        try:
+            # Process tag photos
+            detection_data = await self.process_tag_photos(tag)
+            
+            # Save results
+            self.save_detections(tag.id, detection_data)
+            self.save_summary(tag.id, detection_data["summary"])
+            
+            # Print summary
+            print(f"\n📊 Summary for '{tag.title}':")
+            total_detections = detection_data.get('total_detections', 0)
+            detected_objects = detection_data.get('detected_objects', [])
+            print(f"   Objects detected: {total_detections}")
+            print(f"   Unique types: {len(detected_objects)}")
+            if detected_objects:
+                print(f"   Types: {', '.join(detected_objects[:5])}")
+                if len(detected_objects) > 5:
+                    print(f"   ... and {len(detected_objects) - 5} more")
+            
+        except Exception as e:
+            print(f"❌ Error processing tag '{tag.title}': {e}")
+            import traceback
+            traceback.print_exc()
+    
+    async def _process_tags_async(self, tags: List[Tag]):
+        """Process tags concurrently under one shared request limit.
+        
+        Args:
+            tags: Tags to process
+        """
+        # Created here so it belongs to the running event loop
+        self._sem = asyncio.Semaphore(self.max_concurrency)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._executor = executor
+            try:
+                await asyncio.gather(*(self._process_tag(tag) for tag in tags))
+            finally:
+                self._executor = None
+    
     def process_all_tags(self, tag_id: Optional[str] = None):
         """Process evidence images for tags.
         
@@ -470,31 +1028,8 @@ class EvidenceProcessor:
         print(f"\n🚀 Starting evidence processing for {len(tags_to_process)} tag(s)...")
         print("=" * 60)
         
-        # Process each tag
-        for tag in tags_to_process:
-            try:
-                # Process tag photos
-                detection_data = self.process_tag_photos(tag)
-                
-                # Save results
-                self.save_detections(tag.id, detection_data)
-                self.save_summary(tag.id, detection_data["summary"])
-                
-                # Print summary
-                print(f"\n📊 Summary for '{tag.title}':")
-                total_detections = detection_data.get('total_detections', 0)
-                detected_objects = detection_data.get('detected_objects', [])
-                print(f"   Objects detected: {total_detections}")
-                print(f"   Unique types: {len(detected_objects)}")
-                if detected_objects:
-                    print(f"   Types: {', '.join(detected_objects[:5])}")
-                    if len(detected_objects) > 5:
-                        print(f"   ... and {len(detected_objects) - 5} more")
-                
-            except Exception as e:
-                print(f"❌ Error processing tag '{tag.title}': {e}")
-                import traceback
-                traceback.print_exc()
+        # Photos of all tags share the same pool of in-flight requests
+        asyncio.run(self._process_tags_async(tags_to_process))
         
         print("\n" + "=" * 60)
         print("✅ Evidence processing complete!")
@@ -519,10 +1054,50 @@ def main():
         help="Google Gemini API key (or set GOOGLE_API_KEY environment variable)"
     )
     
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=config.GEMINI_MAX_CONCURRENCY,
+        help="Maximum number of Gemini requests in flight at once"
+    )
+    
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=config.PHOTO_WORKERS,
+        help="Number of threads for decoding, annotating and saving images"
+    )
+    
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=config.GEMINI_BATCH_SIZE,
+        help="Photos per Gemini request (1 sends each photo on its own)"
+    )
+    
+    parser.add_argument(
+        "--format",
+        choices=["jpg", "png", "webp"],
+        help="Format for annotated images (default: same as the original photo)"
+    )
+    
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Ignore cached responses and send every photo to Gemini again"
+    )
+    
     args = parser.parse_args()
     
     # Initialize processor
-    processor = EvidenceProcessor(api_key=args.api_key)
+    processor = EvidenceProcessor(
+        api_key=args.api_key,
+        max_concurrency=args.concurrency,
+        use_cache=not args.no_cache,
+        max_workers=args.workers,
+        batch_size=args.batch_size,
+        output_format=args.format
+    )
     
     # Process tags
     processor.process_all_tags(tag_id=args.tag_id)
@@ -0,0 +1,137 @@
+"""Batched tag marker geometry."""
+import open3d as o3d
+import numpy as np
+from typing import Dict, List, Tuple
+from src.models.tag import Tag
+from src.utils.geometry_utils import GeometryUtils
+import config
+
+DEAD_SLOT_LIMIT = 64  # Deleted markers tolerated before the arrays are compacted
+
+class MarkerBatch:
+    """Holds every tag marker in one triangle mesh.
+    
+    Each tag owns a contiguous range of vertices and triangles, so the
+    whole tag layer is one scene geometry and one draw call. Deleting a
+    tag only collapses its triangles; the dead ranges are cut out of the
+    arrays in one pass once DEAD_SLOT_LIMIT of them have built up.
+    
+    Vertex colors are the tag colors squared. Markers used to be painted
+    with the tag color and lit with it as base color as well; the batch
+    shares one white material, so squaring keeps that look.
+    """
+    
+    def __init__(self, radius: float = config.MARKER_RADIUS):
+        self.radius = radius
+        self._clear()
+    
+    def _clear(self) -> None:
+        """Empty the batch."""
+        self.vertices = np.zeros((0, 3))
+        self.normals = np.zeros((0, 3))
+        self.colors = np.zeros((0, 3))
+        self.triangles = np.zeros((0, 3), dtype=np.int32)
+        # tag id -> (v_start, v_end, t_start, t_end)
+        self.ranges: Dict[str, Tuple[int, int, int, int]] = {}
+        self._centers: Dict[str, np.ndarray] = {}
+        self._dead: List[Tuple[int, int, int, int]] = []  # Ranges of deleted tags
+    
+    def __len__(self) -> int:
+        return len(self.ranges)
+    
+    def rebuild(self, tags: List[Tag]) -> None:
+        """Replace the batch contents with markers for the given tags."""
+        self._clear()
+        if not tags:
+            return
+        
+        # Every marker is a copy of the unit sphere, so the whole batch is
+        # built with broadcasting instead of one slab per tag
+        unit_v, _, unit_t = GeometryUtils.unit_sphere()
+        n_v, n_t = len(unit_v), len(unit_t)
+        coords = np.array([tag.coords for tag in tags], dtype=np.float64)
+        colors = np.array(
+            [tag.color or config.DEFAULT_TAG_COLOR for tag in tags],
+            dtype=np.float64
+        ) ** 2
+        
+        self.vertices, self.normals, self.colors, self.triangles = (
+            GeometryUtils.marker_arrays(coords, colors, self.radius)
+        )
+        
+        for i, tag in enumerate(tags):
+            self.ranges[tag.id] = (i * n_v, (i + 1) * n_v, i * n_t, (i + 1) * n_t)
+            self._centers[tag.id] = coords[i]
+    
+    def add(self, tag: Tag) -> None:
+        """Append a marker for a new tag."""
+        color = np.asarray(tag.color or config.DEFAULT_TAG_COLOR, dtype=np.float64) ** 2
+        v, n, c, t = GeometryUtils.marker_arrays(tag.coords, color, self.radius)
+        v_start, t_start = len(self.vertices), len(self.triangles)
+        
+        self.vertices = np.concatenate([self.vertices, v])
+        self.normals = np.concatenate([self.normals, n])
+        self.colors = np.concatenate([self.colors, c])
+        self.triangles = np.concatenate([self.triangles, t + v_start])
+        self.ranges[tag.id] = (v_start, len(self.vertices), t_start, len(self.triangles))
+        self._centers[tag.id] = np.array(tag.coords, dtype=np.float64)
+    
+    def remove(self, tag_id: str) -> bool:
+        """Hide a tag's marker by collapsing its triangles onto one vertex."""
+        if tag_id not in self.ranges:
+            return False
+        
+        v_start, v_end, t_start, t_end = self.ranges.pop(tag_id)
+        del self._centers[tag_id]
+        self.triangles[t_start:t_end] = v_start  # Zero-area, draws nothing
+        self._dead.append((v_start, v_end, t_start, t_end))
+        
+        if len(self._dead) > DEAD_SLOT_LIMIT:
+            self.compact()
+        return True
+    
+    def compact(self) -> None:
+        """Cut the ranges of deleted markers out of the arrays."""
+        if not self._dead:
+            return
+        
+        v_keep = np.ones(len(self.vertices), dtype=bool)
+        t_keep = np.ones(len(self.triangles), dtype=bool)
+        for v_start, v_end, t_start, t_end in self._dead:
+            v_keep[v_start:v_end] = False
+            t_keep[t_start:t_end] = False
+        self._dead = []
+        
+        # Number of dropped entries before each index, used to shift indices down
+        v_dropped = np.cumsum(~v_keep)
+        t_dropped = np.cumsum(~t_keep)
+        
+        self.vertices = self.vertices[v_keep]
+        self.normals = self.normals[v_keep]
+        self.colors = self.colors[v_keep]
+        triangles = self.triangles[t_keep]
+        self.triangles = (triangles - v_dropped[triangles]).astype(np.int32)
+        
+        for tag_id, (vs, ve, ts, te) in self.ranges.items():
+            v_shift, t_shift = int(v_dropped[vs]), int(t_dropped[ts])
+            self.ranges[tag_id] = (vs - v_shift, ve - v_shift, ts - t_shift, te - t_shift)
+    
+    def move(self, tag: Tag) -> bool:
+        """Translate a tag's marker to the tag's current coordinates."""
+        if tag.id not in self.ranges:
+            return False
+        
+        v_start, v_end, _, _ = self.ranges[tag.id]
+        center = np.array(tag.coords, dtype=np.float64)
+        self.vertices[v_start:v_end] += center - self._centers[tag.id]
+        self._centers[tag.id] = center
+        return True
+    
+    def to_mesh(self) -> o3d.geometry.TriangleMesh:
+        """Assemble the batch into a mesh ready to add to the scene."""
+        mesh = o3d.geometry.TriangleMesh()
+        mesh.vertices = o3d.utility.Vector3dVector(self.vertices)
+        mesh.vertex_normals = o3d.utility.Vector3dVector(self.normals)
+        mesh.vertex_colors = o3d.utility.Vector3dVector(self.colors)
+        mesh.triangles = o3d.utility.Vector3iVector(self.triangles)
+        return mesh
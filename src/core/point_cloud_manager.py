@@ -1,13 +1,41 @@
 """Point cloud loading and management."""
+import functools
+import hashlib
+import os
 import open3d as o3d
+import numpy as np
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional, Tuple
+import config
+
+MARKER_RADIUS = 0.15
+MARKER_POINTS = 500
+
+# PLY property types -> little-endian NumPy dtypes
+PLY_TYPES = {
+    "char": "i1", "int8": "i1", "uchar": "u1", "uint8": "u1",
+    "short": "<i2", "int16": "<i2", "ushort": "<u2", "uint16": "<u2",
+    "int": "<i4", "int32": "<i4", "uint": "<u4", "uint32": "<u4",
+    "float": "<f4", "float32": "<f4", "double": "<f8", "float64": "<f8",
+}
+
+@functools.lru_cache(maxsize=None)
+def _unit_marker_points() -> np.ndarray:
+    """Sample the exported marker sphere once, centred on the origin."""
+    sphere = o3d.geometry.TriangleMesh.create_sphere(radius=MARKER_RADIUS)
+    sampled = sphere.sample_points_uniformly(number_of_points=MARKER_POINTS)
+    return np.asarray(sampled.points)
 
 class PointCloudManager:
     """Manages point cloud loading and operations."""
     
     def __init__(self):
         self.pcd: Optional[o3d.geometry.PointCloud] = None
+        self.n_points = 0
+        self.bounds: Optional[o3d.geometry.AxisAlignedBoundingBox] = None
+        self.source_path: Optional[Path] = None
+        self._low_detail: Optional[o3d.geometry.PointCloud] = None
+        self._lods: Optional[List[o3d.geometry.PointCloud]] = None
     
     def load(self, path: Path) -> bool:
         """Load point cloud from file."""
@@ -16,44 +44,250 @@ class PointCloudManager:
             return False
         
         try:
-            self.pcd = o3d.io.read_point_cloud(str(path))
+            cache_path = self._cache_path(path)
+            self.pcd = self._load_cached(cache_path)
+            if self.pcd is None:
+                self.pcd = o3d.io.read_point_cloud(str(path))
+                if self.pcd.has_points():
+                    self._store_cached(cache_path)
             if not self.pcd.has_points():
                 print("❌ Empty point cloud.")
                 return False
-            print(f"✅ Loaded {len(self.pcd.points):,} points.")
+            
+            # The cloud is never edited, so these are computed once
+            self.n_points = len(self.pcd.points)
+            self.bounds = self.pcd.get_axis_aligned_bounding_box()
+            self.source_path = path
+            self._low_detail = None
+            self._lods = None
+            print(f"✅ Loaded {self.n_points:,} points.")
             return True
         except Exception as e:
             print(f"❌ Error loading point cloud: {e}")
             return False
     
+    @staticmethod
+    def _cache_path(path: Path) -> Path:
+        """Cache file for a point cloud, keyed by its path, mtime and size."""
+        stat = path.stat()
+        key = f"{path.resolve()}:{stat.st_mtime_ns}:{stat.st_size}"
+        digest = hashlib.blake2b(key.encode(), digest_size=8).hexdigest()
+        return config.POINT_CLOUD_CACHE_DIR / f"{digest}.npz"
+    
+    @staticmethod
+    def _load_cached(cache_path: Path) -> Optional[o3d.geometry.PointCloud]:
+        """Rebuild a point cloud from its decoded arrays, None on a miss."""
+        if not cache_path.exists():
+            return None
+        
+        try:
+            pcd = o3d.geometry.PointCloud()
+            with np.load(cache_path) as arrays:
+                pcd.points = o3d.utility.Vector3dVector(arrays["points"])
+                if "colors" in arrays:
+                    pcd.colors = o3d.utility.Vector3dVector(arrays["colors"])
+                if "normals" in arrays:
+                    pcd.normals = o3d.utility.Vector3dVector(arrays["normals"])
+            os.utime(cache_path)  # Mark as recently used
+            print("⚡ Loaded point cloud from cache.")
+            return pcd
+        except Exception as e:
+            print(f"⚠️ Ignoring unreadable point cloud cache: {e}")
+            return None
+    
+    def _store_cached(self, cache_path: Path) -> None:
+        """Save the decoded arrays and evict old entries beyond the size budget."""
+        arrays = {"points": np.asarray(self.pcd.points)}
+        if self.pcd.has_colors():
+            arrays["colors"] = np.asarray(self.pcd.colors)
+        if self.pcd.has_normals():
+            arrays["normals"] = np.asarray(self.pcd.normals)
+        
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(tmp_path, cache_path)
+            self._evict_cache(keep=cache_path)
+        except Exception as e:
+            print(f"⚠️ Could not cache point cloud: {e}")
+    
+    @staticmethod
+    def _evict_cache(keep: Path) -> None:
+        """Delete least recently used cache files until the total fits the budget."""
+        entries = sorted(
+            (entry.stat().st_mtime_ns, entry.stat().st_size, entry)
+            for entry in config.POINT_CLOUD_CACHE_DIR.glob("*.npz")
+        )
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in entries:
+            if total <= config.POINT_CLOUD_CACHE_MAX_BYTES:
+                break
+            if entry != keep:
+                entry.unlink(missing_ok=True)
+                total -= size
+    
     def get_point_cloud(self) -> Optional[o3d.geometry.PointCloud]:
         """Get the loaded point cloud."""
         return self.pcd
     
-    def export_with_tags(self, tags: list, output_path: Path) -> bool:
-        """Export point cloud with tag markers embedded."""
+    def get_low_detail_cloud(self) -> Optional[o3d.geometry.PointCloud]:
+        """Get a uniformly thinned copy of the cloud for drawing during camera moves."""
+        if self._low_detail is None and self.pcd is not None:
+            self._low_detail = self.pcd.uniform_down_sample(
+                every_k_points=config.INTERACTION_POINT_STRIDE
+            )
+        return self._low_detail
+    
+    def get_lod_clouds(self) -> List[o3d.geometry.PointCloud]:
+        """Get voxel-downsampled levels of detail, finest first."""
+        if self._lods is None and self.pcd is not None:
+            voxel = self.bounds.get_extent().max() / config.LOD_VOXEL_DIVISOR
+            self._lods = [
+                self.pcd.voxel_down_sample(voxel * 2 ** level)
+                for level in range(config.LOD_LEVELS)
+            ]
+        return self._lods or []
+    
+    def export_with_tags(
+        self,
+        coords: np.ndarray,
+        colors: np.ndarray,
+        output_path: Path
+    ) -> bool:
+        """Export point cloud with tag markers embedded.
+        
+        coords and colors are (N, 3) arrays with one row per tag. Binary
+        little-endian sources are copied byte for byte with the marker
+        vertices appended; other formats go through Open3D.
+        """
         if not self.pcd:
             return False
         
         try:
-            from src.utils.geometry_utils import GeometryUtils
+            # Translate one sampled sphere to every tag at once
+            unit = _unit_marker_points()
+            marker_points = (unit[None, :, :] + coords[:, None, :]).reshape(-1, 3)
+            marker_colors = np.repeat(colors, len(unit), axis=0)
             
-            combined_cloud = o3d.geometry.PointCloud(self.pcd)
+            if self._append_to_binary_ply(marker_points, marker_colors, output_path):
+                return True
             
-            for tag in tags:
-                marker_sphere = o3d.geometry.TriangleMesh.create_sphere(
-                    radius=0.15
-                )
-                marker_sphere.translate(tag["coords"])
-                marker_pcd = marker_sphere.sample_points_uniformly(
-                    number_of_points=500
-                )
-                
-                tag_color = tag.get("color", [1.0, 0.0, 0.0])
-                GeometryUtils.paint_point_cloud(marker_pcd, tag_color)
+            combined_cloud = o3d.geometry.PointCloud(self.pcd)
+            if len(marker_points):
+                marker_pcd = o3d.geometry.PointCloud()
+                marker_pcd.points = o3d.utility.Vector3dVector(marker_points)
+                marker_pcd.colors = o3d.utility.Vector3dVector(marker_colors)
                 combined_cloud += marker_pcd
             
             return o3d.io.write_point_cloud(str(output_path), combined_cloud)
         except Exception as e:
             print(f"❌ Export error: {e}")
             return False
+    
+    @staticmethod
+    def _read_ply_header(f) -> Optional[Tuple[List[bytes], int, np.dtype]]:
+        """Parse a vertex-only binary little-endian PLY header.
+        
+        Returns the header lines, vertex count and vertex dtype, or None
+        if the file has another layout.
+        """
+        if f.readline().strip() != b"ply":
+            return None
+        
+        lines, count, fields = [b"ply\n"], None, []
+        for line in f:
+            lines.append(line)
+            words = line.split()
+            if not words or words[0] in (b"comment", b"obj_info"):
+                continue
+            if words[0] == b"format" and words[1] != b"binary_little_endian":
+                return None
+            if words[0] == b"element":
+                if words[1] != b"vertex" or count is not None:
+                    return None  # Faces or other elements follow the vertices
+                count = int(words[2])
+            elif words[0] == b"property":
+                ply_type = PLY_TYPES.get(words[1].decode())
+                if ply_type is None:
+                    return None  # List properties have no fixed size
+                fields.append((words[2].decode(), ply_type))
+            elif words[0] == b"end_header":
+                break
+        
+        if count is None or not fields or lines[-1].strip() != b"end_header":
+            return None
+        return lines, count, np.dtype(fields)
+    
+    def _append_to_binary_ply(
+        self,
+        points: np.ndarray,
+        colors: np.ndarray,
+        output_path: Path
+    ) -> bool:
+        """Copy the source PLY and append marker vertices, without decoding it.
+        
+        The original vertex block is copied with os.sendfile where available.
+        Returns False if the source is not a vertex-only binary PLY.
+        """
+        if self.source_path is None or self.source_path.suffix.lower() != ".ply":
+            return False
+        
+        with open(self.source_path, "rb") as src:
+            header = self._read_ply_header(src)
+            if header is None:
+                return False
+            lines, count, dtype = header
+            body_start = src.tell()
+            body_len = count * dtype.itemsize
+            if os.fstat(src.fileno()).st_size < body_start + body_len:
+                return False
+            
+            markers = np.zeros(len(points), dtype=dtype)
+            for axis, name in enumerate(("x", "y", "z")):
+                if name in dtype.names:
+                    markers[name] = points[:, axis]
+            for channel, name in enumerate(("red", "green", "blue")):
+                if name in dtype.names:
+                    if dtype[name].kind == "f":
+                        markers[name] = colors[:, channel]
+                    else:
+                        markers[name] = np.round(colors[:, channel] * 255)
+            
+            header_bytes = b"".join(
+                b"element vertex %d\n" % (count + len(markers))
+                if line.startswith(b"element vertex") else line
+                for line in lines
+            )
+            
+            with open(output_path, "wb") as out:
+                out.write(header_bytes)
+                out.flush()
+                self._copy_range(src, out, body_start, body_len)
+                out.write(markers.tobytes())
+        return True
+    
+    @staticmethod
+    def _copy_range(src, out, offset: int, length: int) -> None:
+        """Copy length bytes of src from offset to the end of out."""
+        if hasattr(os, "sendfile"):
+            try:
+                # Kernel-side copy; Linux allows file-to-file sendfile
+                while length:
+                    sent = os.sendfile(out.fileno(), src.fileno(), offset, length)
+                    if sent == 0:
+                        break
+                    offset += sent
+                    length -= sent
+            except OSError:
+                pass  # Sockets only on some platforms; copy the rest below
+            out.seek(0, os.SEEK_END)
+        
+        src.seek(offset)
+        while length:
+            chunk = src.read(min(length, 1 << 20))
+            if not chunk:
+                raise IOError("Source PLY ended early")
+            out.write(chunk)
+            length -= len(chunk)
@@ -1,71 +1,198 @@
 """Tag storage and management operations."""
-import json
+import numpy as np
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Tuple
 from src.models.tag import Tag
+from src.utils.json_utils import JsonUtils
 import config
 
 class TagManager:
-    """Manages tag persistence and operations."""
+    """Manages tag persistence and operations.
+    
+    Tags are stored as a JSON snapshot plus an append-only journal next to
+    it (tags.jsonl). Each change appends one line to the journal; load()
+    replays it on top of the snapshot, and compact() folds it back into
+    the snapshot.
+    
+    coords and colors mirror the tag list as (N, 3) arrays, row i
+    belonging to tags[i], so exports can use them without walking the tags.
+    They are views into buffers that grow by doubling, so adding a tag
+    does not copy every row.
+    """
     
     def __init__(self, storage_path: Path = config.TAGS_FILE):
         self.storage_path = storage_path
+        self.journal_path = storage_path.with_suffix(".jsonl")
         self.tags: List[Tag] = []
+        self._by_id: Dict[str, Tag] = {}  # Kept in sync with self.tags
+        self._loaded_state: Optional[Tuple[Optional[int], Optional[int]]] = None
+        self._coords = np.zeros((0, 3))  # Capacity >= len(self.tags)
+        self._colors = np.zeros((0, 3))
+    
+    def _file_state(self) -> Tuple[Optional[int], Optional[int]]:
+        """Modification times of the snapshot and journal, None if missing."""
+        return tuple(
+            path.stat().st_mtime_ns if path.exists() else None
+            for path in (self.storage_path, self.journal_path)
+        )
     
     def load(self) -> List[Tag]:
-        """Load tags from JSON file."""
-        if not self.storage_path.exists():
+        """Load tags from the snapshot and journal, skipping unchanged files."""
+        if not self.storage_path.exists() and not self.journal_path.exists():
             return []
         
         try:
-            with open(self.storage_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-                self.tags = [Tag.from_dict(tag_dict) for tag_dict in data]
+            state = self._file_state()
+            if state == self._loaded_state:
                 return self.tags
+            
+            self._by_id = {}
+            if self.storage_path.exists():
+                data = JsonUtils.loads(self.storage_path.read_bytes())
+                self._by_id = {tag.id: tag for tag in map(Tag.from_dict, data)}
+            if self.journal_path.exists():
+                self._replay_journal()
+            
+            # Dicts keep insertion order, so list order survives updates
+            self.tags = list(self._by_id.values())
+            self._rebuild_arrays()
+            self._loaded_state = state
+            return self.tags
         except Exception as e:
             print(f"❌ Error loading tags: {e}")
             return []
     
+    @property
+    def coords(self) -> np.ndarray:
+        """Tag coordinates as an (N, 3) array."""
+        return self._coords[:len(self.tags)]
+    
+    @property
+    def colors(self) -> np.ndarray:
+        """Tag colors as an (N, 3) array."""
+        return self._colors[:len(self.tags)]
+    
+    def _reserve(self, count: int) -> None:
+        """Grow the array buffers to hold at least count rows."""
+        capacity = len(self._coords)
+        if count <= capacity:
+            return
+        capacity = max(count, capacity * 2, 16)
+        for name in ("_coords", "_colors"):
+            old = getattr(self, name)
+            grown = np.zeros((capacity, 3))
+            grown[:len(old)] = old
+            setattr(self, name, grown)
+    
+    @staticmethod
+    def _color_row(tag: Tag) -> List[float]:
+        """Tag color, red for tags saved without one."""
+        return tag.color or config.DEFAULT_TAG_COLOR
+    
+    def _rebuild_arrays(self) -> None:
+        """Rebuild the coordinate and color arrays from the tag list."""
+        self._coords = np.array([t.coords for t in self.tags], dtype=np.float64).reshape(-1, 3)
+        self._colors = np.array(
+            [self._color_row(t) for t in self.tags],
+            dtype=np.float64
+        ).reshape(-1, 3)
+    
+    def _replay_journal(self) -> None:
+        """Apply journal entries in order: tag dicts upsert, tombstones delete."""
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    entry = JsonUtils.loads(line)
+                except ValueError:
+                    continue  # Blank or torn line from an interrupted write
+                if "_deleted" in entry:
+                    self._by_id.pop(entry["_deleted"], None)
+                else:
+                    tag = Tag.from_dict(entry)
+                    self._by_id[tag.id] = tag
+    
+    def _append(self, entry: dict) -> bool:
+        """Append one entry to the journal."""
+        try:
+            self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.journal_path, "a+b") as f:
+                prefix = b""
+                if f.tell() > 0:
+                    # Terminate a line torn by an interrupted write
+                    f.seek(-1, 2)
+                    if f.read(1) != b"\n":
+                        prefix = b"\n"
+                f.write(prefix + JsonUtils.dumps(entry) + b"\n")
+            self._loaded_state = self._file_state()
+            return True
+        except Exception as e:
+            print(f"❌ Failed to save tag change: {e}")
+            return False
+    
     def save(self) -> bool:
-        """Save tags to JSON file."""
+        """Write all tags to the JSON snapshot and clear the journal."""
         try:
             self.storage_path.parent.mkdir(parents=True, exist_ok=True)
-            with open(self.storage_path, "w", encoding="utf-8") as f:
-                json.dump(
-                    [tag.to_dict() for tag in self.tags],
-                    f,
-                    indent=4
-                )
+            JsonUtils.write(
+                self.storage_path,
+                [tag.to_dict() for tag in self.tags],
+                indent=True
+            )
+            if self.journal_path.exists():
+                self.journal_path.unlink()
+            self._loaded_state = self._file_state()
             print("✅ Tags saved.")
             return True
         except Exception as e:
             print(f"❌ Failed to save tags: {e}")
             return False
     
+    def compact(self) -> bool:
+        """Fold the journal into the snapshot, if there is anything to fold."""
+        if not self.journal_path.exists():
+            return True
+        return self.save()
+    
     def add_tag(self, tag: Tag) -> None:
         """Add a new tag."""
         self.tags.append(tag)
-        self.save()
+        self._by_id[tag.id] = tag
+        self._reserve(len(self.tags))
+        self._coords[len(self.tags) - 1] = tag.coords
+        self._colors[len(self.tags) - 1] = self._color_row(tag)
+        self._append(tag.to_dict())
     
     def remove_tag(self, tag_id: str) -> bool:
         """Remove tag by ID."""
-        original_length = len(self.tags)
-        self.tags = [t for t in self.tags if t.id != tag_id]
+        tag = self._by_id.pop(tag_id, None)
+        if tag is None:
+            return False
         
-        if len(self.tags) < original_length:
-            self.save()
-            return True
-        return False
+        index = self.tags.index(tag)
+        del self.tags[index]
+        # Shift the later rows up in place, keeping list order
+        count = len(self.tags)
+        self._coords[index:count] = self._coords[index + 1:count + 1]
+        self._colors[index:count] = self._colors[index + 1:count + 1]
+        return self._append({"_deleted": tag_id})
     
     def get_tag_by_id(self, tag_id: str) -> Tag:
         """Retrieve tag by ID."""
-        return next((t for t in self.tags if t.id == tag_id), None)
+        return self._by_id.get(tag_id)
     
     def update_tag_coords(self, tag_id: str, new_coords: List[float]) -> bool:
         """Update coordinates of an existing tag."""
         tag = self.get_tag_by_id(tag_id)
         if tag:
             tag.coords = new_coords
-            self.save()
-            return True
-        return False
\ No newline at end of file
+            self._coords[self.tags.index(tag)] = new_coords
+            return self._append(tag.to_dict())
+        return False
+    
+    def update_tag_photos(self, tag_id: str, photos: List[str]) -> bool:
+        """Replace the photo list of an existing tag."""
+        tag = self.get_tag_by_id(tag_id)
+        if tag:
+            tag.photos = photos
+            return self._append(tag.to_dict())
+        return False
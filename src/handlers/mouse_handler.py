@@ -1,17 +1,18 @@
 """Mouse event handling for 3D point picking."""
 import open3d.visualization.gui as gui
-import numpy as np
+from src.utils.geometry_utils import GeometryUtils
 
 class MouseHandler:
     """Handles mouse events for 3D scene interaction."""
     
     def __init__(self, scene_widget, coord_callback, status_callback, 
-                 marker_callback, move_callback=None):
+                 marker_callback, move_callback=None, interaction_callback=None):
         self.scene_widget = scene_widget
         self.coord_callback = coord_callback
         self.status_callback = status_callback
         self.marker_callback = marker_callback
         self.move_callback = move_callback
+        self.interaction_callback = interaction_callback  # Camera drag/zoom
         self.move_mode = False
     
     def set_move_mode(self, enabled: bool):
@@ -20,6 +21,14 @@ class MouseHandler:
     
     def handle_mouse_event(self, event):
         """Process mouse events for Shift+Click picking and move mode."""
+        if self.interaction_callback and event.type in (
+            gui.MouseEvent.Type.DRAG,
+            gui.MouseEvent.Type.WHEEL
+        ):
+            # Let the widget move the camera, but report the interaction
+            self.interaction_callback()
+            return gui.Widget.EventCallbackResult.IGNORED
+        
         if event.type == gui.MouseEvent.Type.BUTTON_DOWN:
             if event.is_modifier_down(gui.KeyModifier.SHIFT):
                 # In move mode, Shift+Click moves selected tag
@@ -35,47 +44,41 @@ class MouseHandler:
     
     def _handle_shift_click(self, x: int, y: int):
         """Handle Shift+Click to pick 3D point."""
-        def depth_callback(depth_image):
-            depth = np.asarray(depth_image)
-            if y < depth.shape[0] and x < depth.shape[1]:
-                depth_value = depth[y, x]
-                if depth_value < 1.0:
-                    widget = self.scene_widget
-                    world_point = widget.scene.camera.unproject(
-                        x, y, depth_value,
-                        widget.frame.width,
-                        widget.frame.height
-                    )
-                    
-                    coord_str = (f"{world_point[0]:.3f}, "
-                               f"{world_point[1]:.3f}, "
-                               f"{world_point[2]:.3f}")
-                    
-                    self.coord_callback(coord_str)
-                    self.status_callback(
-                        f"📍 Point selected: ({coord_str})",
-                        [0.2, 0.8, 0.3]
-                    )
-                    self.marker_callback(world_point)
+        def on_point(world_point):
+            coord_str = GeometryUtils.format_coords(world_point)
+            
+            self.coord_callback(coord_str)
+            self.status_callback(
+                f"📍 Point selected: ({coord_str})",
+                [0.2, 0.8, 0.3]
+            )
+            self.marker_callback(world_point)
         
-        self.scene_widget.scene.scene.render_to_depth_image(depth_callback)
+        self._pick_point(x, y, on_point)
     
     def _handle_move_click(self, x: int, y: int):
         """Handle Shift+Click in move mode to relocate selected tag."""
+        def on_point(world_point):
+            # Call move callback with new coordinates
+            if self.move_callback:
+                self.move_callback(world_point)
+        
+        self._pick_point(x, y, on_point)
+    
+    def _pick_point(self, x: int, y: int, on_point):
+        """Unproject the clicked pixel and pass the world point to on_point."""
+        widget = self.scene_widget
+        width, height = widget.frame.width, widget.frame.height
+        
         def depth_callback(depth_image):
-            depth = np.asarray(depth_image)
-            if y < depth.shape[0] and x < depth.shape[1]:
+            # Index the depth buffer in place rather than building an array
+            depth = memoryview(depth_image)
+            rows, cols = depth.shape[0], depth.shape[1]
+            if 0 <= y < rows and 0 <= x < cols:
                 depth_value = depth[y, x]
                 if depth_value < 1.0:
-                    widget = self.scene_widget
-                    world_point = widget.scene.camera.unproject(
-                        x, y, depth_value,
-                        widget.frame.width,
-                        widget.frame.height
-                    )
-                    
-                    # Call move callback with new coordinates
-                    if self.move_callback:
-                        self.move_callback(world_point)
+                    on_point(widget.scene.camera.unproject(
+                        x, y, depth_value, width, height
+                    ))
         
-        self.scene_widget.scene.scene.render_to_depth_image(depth_callback)
+        widget.scene.scene.render_to_depth_image(depth_callback)
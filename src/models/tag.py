@@ -3,7 +3,7 @@ import uuid
 from dataclasses import dataclass, field
 from typing import List
 
-@dataclass
+@dataclass(slots=True)
 class Tag:
     """Represents a 3D annotation tag."""
     title: str
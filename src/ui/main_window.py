@@ -1,21 +1,39 @@
 """Main application window and UI orchestration."""
 import open3d.visualization.gui as gui
 import open3d.visualization.rendering as rendering
-from datetime import datetime
-import json
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import sys
+import threading
+import time
+import numpy as np
 
 import config
+from src.core.marker_batch import MarkerBatch
 from src.core.point_cloud_manager import PointCloudManager
 from src.core.tag_manager import TagManager
 from src.models.tag import Tag
 from src.utils.geometry_utils import GeometryUtils
 from src.utils.file_manager import FileManager
+from src.utils.json_utils import JsonUtils
 from src.handlers.mouse_handler import MouseHandler
 from src.ui.panels.coordinate_panel import CoordinatePanel
 from src.ui.panels.tag_info_panel import TagInfoPanel
 from src.ui.panels.photo_panel import PhotoPanel
 
+WHITE_RGBA = (1.0, 1.0, 1.0, 1.0)
+SHIFT_KEYS = frozenset({gui.KeyName.LEFT_SHIFT, gui.KeyName.RIGHT_SHIFT})
+
+@functools.lru_cache(maxsize=64)
+def _marker_template(radius: float, color: tuple):
+    """Sphere marker at the origin, built once per (radius, color).
+    
+    The scene copies geometry on add, and markers are positioned by
+    transform, so the cached mesh is never modified.
+    """
+    marker, _ = GeometryUtils.create_marker([0, 0, 0], list(color), radius)
+    return marker
+
 class MainWindow:
     """Main application window controller."""
     
@@ -24,10 +42,19 @@ class MainWindow:
         self.scene_widget = None
         self.pcd_manager = PointCloudManager()
         self.tag_manager = TagManager()
+        self.tag_batch = MarkerBatch()  # All tag markers, drawn as one mesh
         self.selected_tag_id = None
         self.move_mode = False
         self.mouse_handler = None
         self.shift_pressed = False  # Track shift key state manually
+        self._materials = {}  # (shader, color tuple) -> shared MaterialRecord
+        self._pending_status = None  # Latest (message, color), applied on tick
+        self._applied_status = None
+        self._text_colors = {}  # rgb tuple -> gui.Color, status colors come from a small palette
+        self._io_pool = ThreadPoolExecutor(max_workers=config.PHOTO_COPY_WORKERS)
+        self._photo_jobs = {}  # tag id -> (tag, future) for photo copies in flight
+        self._closing = False  # Set once the window closes; no more posts to it
+        self._closing_lock = threading.Lock()
         
         # UI Panels
         self.coord_panel = None
@@ -36,7 +63,19 @@ class MainWindow:
         self.status_label = None
         self.stats_label = None
         self.tag_list = None
+        self._list_tag_ids = []  # Tag ID per tag list row
+        self._tag_labels = []  # Cached label per tag list row
+        self._pushed_tag_labels = []  # Labels last given to the ListView
+        self._tag_list_dirty = False
         self.move_mode_label = None
+        self._deferred_panel = None  # (panel, em) until the first tick builds the rest
+        self._temp_marker_visible = False
+        self._optional_geometry = set()  # Names of tags_batch/tag_highlight when in the scene
+        self._highlighted_id = None  # Tag under the tag_highlight overlay
+        self._tag_batch_dirty = False  # Batch changed since it was last submitted
+        self._cloud_shown = "cloud"  # Visible point cloud geometry
+        self._cloud_levels = ["cloud"]  # Cloud geometries, densest first
+        self._last_interaction = 0.0  # time.monotonic() of the last camera drag/zoom
     
     def initialize(self):
         """Initialize the application window."""
@@ -66,8 +105,9 @@ class MainWindow:
         # Setup window-level keyboard handler (backup)
         self.window.set_on_key(self._on_key_event)
         
-        # Add existing tags to scene
-        self._render_existing_tags()
+        # Per-frame callback for coalesced UI updates
+        self.window.set_on_tick_event(self._on_tick)
+        self.window.set_on_close(self._on_close)
         
         print("✅ Application ready. Shift+Click to tag points in 3D space.")
         print("   Press Shift+M or click 'Toggle Move Mode' button to move tags.")
@@ -133,6 +173,17 @@ class MainWindow:
         panel.add_child(export_btn)
         panel.add_fixed(em)
         
+        # The tag list, stats and help are built on the first tick so the
+        # window can show its first frame sooner
+        self._deferred_panel = (panel, em)
+        
+        return panel
+    
+    def _build_deferred_ui(self):
+        """Add the tag list, stats and help sections to the main panel."""
+        panel, em = self._deferred_panel
+        self._deferred_panel = None
+        
         # Tag list
         list_section = gui.CollapsableVert(
             "📋 Existing Tags (Click to Select)",
@@ -179,8 +230,7 @@ class MainWindow:
         panel.add_child(help_section)
         
         panel.add_stretch()
-        
-        return panel
+        self.window.set_needs_layout()
     
     def _create_scene_widget(self):
         """Create and configure the 3D scene widget."""
@@ -193,8 +243,9 @@ class MainWindow:
             widget,
             self.coord_panel.set_coordinates,
             self._update_status,
-            self._show_temp_marker,
-            self._on_move_tag
+            self._make_temp_marker_shower(widget.scene),
+            self._on_move_tag,
+            self._on_camera_interaction
         )
         widget.set_on_mouse(self.mouse_handler.handle_mouse_event)
         
@@ -211,9 +262,33 @@ class MainWindow:
             mat
         )
         
+        # Thinned copy drawn instead while the camera moves
+        widget.scene.add_geometry(
+            "cloud_low",
+            self.pcd_manager.get_low_detail_cloud(),
+            mat
+        )
+        widget.scene.show_geometry("cloud_low", False)
+        
+        # Coarser levels of detail for zoomed-out views
+        self._cloud_levels = ["cloud", "cloud_low"]
+        for level, lod in enumerate(self.pcd_manager.get_lod_clouds(), start=1):
+            name = f"cloud_lod{level}"
+            widget.scene.add_geometry(name, lod, mat)
+            widget.scene.show_geometry(name, False)
+            self._cloud_levels.append(name)
+        
+        # Temporary pick marker: added once at the origin, then moved by
+        # transform and shown/hidden instead of being rebuilt per pick
+        widget.scene.add_geometry(
+            "temp_marker",
+            _marker_template(config.TEMP_MARKER_RADIUS, tuple(config.TEMP_MARKER_COLOR)),
+            self._get_material("defaultLit", config.TEMP_MARKER_COLOR_RGBA)
+        )
+        widget.scene.show_geometry("temp_marker", False)
+        
         # Setup camera
-        pcd = self.pcd_manager.get_point_cloud()
-        bounds = pcd.get_axis_aligned_bounding_box()
+        bounds = self.pcd_manager.bounds
         widget.setup_camera(60, bounds, bounds.get_center())
         
         # Lighting
@@ -240,49 +315,174 @@ class MainWindow:
         self.window.add_child(self.scene_widget)
         self.window.add_child(main_panel)
     
+    def _get_material(self, shader: str, color) -> rendering.MaterialRecord:
+        """Return a shared material for a shader and RGB or RGBA color.
+        
+        RGB colors are made opaque; pass an RGBA tuple to skip the copy.
+        """
+        key = (shader, tuple(color))
+        mat = self._materials.get(key)
+        if mat is None:
+            mat = rendering.MaterialRecord()
+            mat.shader = shader
+            mat.base_color = key[1] if len(key[1]) == 4 else (*key[1], 1.0)
+            self._materials[key] = mat
+        return mat
+    
     def _update_status(self, message: str, color: list):
-        """Update status label."""
-        self.status_label.text = message
-        self.status_label.text_color = gui.Color(*color)
-    
-    def _show_temp_marker(self, world_point):
-        """Show temporary marker at selected point."""
-        temp_sphere, _ = GeometryUtils.create_marker(
-            world_point,
-            config.TEMP_MARKER_COLOR,
-            config.TEMP_MARKER_RADIUS
-        )
+        """Queue a status label update; only the latest one per frame is drawn."""
+        self._pending_status = (message, tuple(color))
+    
+    def _flush_status(self) -> bool:
+        """Apply the pending status message if it changed the label."""
+        pending, self._pending_status = self._pending_status, None
+        if pending is None or pending == self._applied_status:
+            return False
         
-        mat = rendering.MaterialRecord()
-        mat.shader = "defaultLit"
-        mat.base_color = config.TEMP_MARKER_COLOR + [1]
+        message, color = pending
+        applied_message, applied_color = self._applied_status or (None, None)
+        if message != applied_message:
+            self.status_label.text = message
+        if color != applied_color:
+            text_color = self._text_colors.get(color)
+            if text_color is None:
+                text_color = self._text_colors[color] = gui.Color(*color)
+            self.status_label.text_color = text_color
+        self._applied_status = pending
+        return True
+    
+    def _on_tick(self) -> bool:
+        """Run once per frame; returns True when the window needs a redraw."""
+        redraw = self._flush_status()
+        if self._deferred_panel is not None:
+            # First tick: finish the panel and draw the saved tags
+            self._build_deferred_ui()
+            self._render_existing_tags()
+            redraw = True
+        if self._tag_batch_dirty:
+            self._submit_tag_batch()
+            redraw = True
+        redraw |= self._flush_tag_list()
+        redraw |= self._update_cloud_level()
+        return redraw
+    
+    def _on_camera_interaction(self):
+        """Draw the thinned cloud while the camera is being dragged or zoomed."""
+        self._last_interaction = time.monotonic()
+        self._update_cloud_level()
+    
+    def _distance_level(self) -> int:
+        """Index into _cloud_levels for the camera's distance from the cloud.
+        
+        Full density within LOD_NEAR_DISTANCE bounds extents, then one
+        LoD coarser each time the distance doubles.
+        """
+        bounds = self.pcd_manager.bounds
+        eye = self.scene_widget.scene.camera.get_model_matrix()[:3, 3]
+        ratio = np.linalg.norm(eye - bounds.get_center()) / bounds.get_extent().max()
+        if ratio < config.LOD_NEAR_DISTANCE:
+            return 0
+        
+        lod = 1 + int(np.log2(ratio / config.LOD_NEAR_DISTANCE))
+        n_lods = len(self._cloud_levels) - 2  # Excluding cloud and cloud_low
+        return 1 + min(lod, n_lods) if n_lods else 0
+    
+    def _update_cloud_level(self) -> bool:
+        """Show the cloud level for the camera distance, thinned while moving."""
+        level = self._distance_level()
+        if time.monotonic() - self._last_interaction <= config.INTERACTION_IDLE_SECONDS:
+            level = max(level, 1)  # At least as coarse as cloud_low
+        return self._show_cloud(self._cloud_levels[level])
+    
+    def _show_cloud(self, name: str) -> bool:
+        """Make one point cloud geometry visible; returns True if it changed."""
+        if name == self._cloud_shown:
+            return False
+        
+        scene = self.scene_widget.scene
+        scene.show_geometry(self._cloud_shown, False)
+        scene.show_geometry(name, True)
+        self._cloud_shown = name
+        return True
+    
+    def _update_stats(self):
+        """Show the current tag count, once the stats label exists."""
+        if self.stats_label is not None:
+            self.stats_label.text = f"📊 Total Tags: {len(self.tag_manager.tags)}"
+    
+    def _refresh_tag_list(self):
+        """Mark the tag list for an update on the next tick."""
+        self._tag_list_dirty = True
+    
+    def _flush_tag_list(self) -> bool:
+        """Push the cached row labels to the tag list if they changed.
         
-        if self.scene_widget.scene.has_geometry("temp_marker"):
-            self.scene_widget.scene.remove_geometry("temp_marker")
+        ListView has no per-row update, and set_items re-lays out every
+        row, so it is called at most once per frame and only on a change.
+        """
+        if not self._tag_list_dirty or self.tag_list is None:
+            return False
         
-        self.scene_widget.scene.add_geometry("temp_marker", temp_sphere, mat)
+        self._tag_list_dirty = False
+        if self._tag_labels == self._pushed_tag_labels:
+            return False
+        self.tag_list.set_items(self._tag_labels)
+        self._pushed_tag_labels = list(self._tag_labels)
+        return True
+    
+    def _make_temp_marker_shower(self, scene):
+        """Return a callback that shows the temporary marker at a picked point.
+        
+        The scene methods and transform matrix are bound once here, so
+        each pick only updates the translation column.
+        """
+        transform = np.eye(4)
+        set_transform = scene.set_geometry_transform
+        show_geometry = scene.show_geometry
+        
+        def show_temp_marker(world_point):
+            transform[:3, 3] = world_point[:3]
+            set_transform("temp_marker", transform)
+            if not self._temp_marker_visible:
+                show_geometry("temp_marker", True)
+                self._temp_marker_visible = True
+        
+        return show_temp_marker
+    
+    def _hide_temp_marker(self):
+        """Hide the temporary marker if it is showing."""
+        if self._temp_marker_visible:
+            self.scene_widget.scene.show_geometry("temp_marker", False)
+            self._temp_marker_visible = False
+    
+    def _parse_tag_inputs(self):
+        """Read and validate the tag form.
+        
+        Returns:
+            tuple: (title, description, coords, photo_paths)
+        
+        Raises:
+            ValueError: If a field is missing or the coordinates are invalid
+        """
+        title = self.info_panel.get_title()
+        description = self.info_panel.get_description()
+        if not title or not description:
+            raise ValueError("Title & description required")
+        
+        coords = GeometryUtils.parse_coords(self.coord_panel.get_coordinates())
+        
+        return title, description, coords, self.photo_panel.get_photos()
     
     def _on_save_tag(self):
         """Handle save tag action."""
+        # Validate everything before anything is stored or copied
+        try:
+            title, description, coords, photo_paths = self._parse_tag_inputs()
+        except ValueError as e:
+            self._update_status(f"❌ {e}", [0.9, 0.2, 0.2])
+            return
+        
         try:
-            title = self.info_panel.get_title()
-            description = self.info_panel.get_description()
-            coords_text = self.coord_panel.get_coordinates()
-            
-            if not title or not description:
-                self._update_status(
-                    "❌ Title & description required",
-                    [0.9, 0.2, 0.2]
-                )
-                return
-            
-            coords = [float(x) for x in coords_text.split(",")]
-            if len(coords) != 3:
-                raise ValueError("Need 3 coordinates")
-            
-            # Get photos
-            photo_paths = self.photo_panel.get_photos()
-            
             # Create tag
             tag_color = GeometryUtils.generate_random_color()
             tag = Tag(
@@ -292,32 +492,35 @@ class MainWindow:
                 color=tag_color
             )
             
-            # Save photos
-            saved_photos = FileManager.save_tag_photos(tag.id, photo_paths)
-            tag.photos = saved_photos
-            
             # Add to manager
             self.tag_manager.add_tag(tag)
             
+            # Copy photos in the background
+            if photo_paths:
+                self._save_photos_async(tag, photo_paths)
+            
             # Add to scene
-            self._render_tag(tag)
+            self.tag_batch.add(tag)
+            self._tag_batch_dirty = True
             
-            # Remove temp marker
-            if self.scene_widget.scene.has_geometry("temp_marker"):
-                self.scene_widget.scene.remove_geometry("temp_marker")
+            # Hide temp marker
+            self._hide_temp_marker()
             
             # Update UI
-            self._update_status(
-                f"✅ Saved '{title}' with {len(saved_photos)} photo(s)",
-                [0.2, 0.8, 0.3]
-            )
-            self.stats_label.text = f"📊 Total Tags: {len(self.tag_manager.tags)}"
+            if photo_paths:
+                message = f"💾 Saved '{title}', copying {len(photo_paths)} photo(s)..."
+            else:
+                message = f"✅ Saved '{title}' with 0 photo(s)"
+            self._update_status(message, [0.2, 0.8, 0.3])
+            self._update_stats()
             
             # Clear inputs
             self.info_panel.clear()
             self.coord_panel.set_coordinates("0.000, 0.000, 0.000")
             self.photo_panel.clear()
-            self._update_tag_list()
+            self._list_tag_ids.append(tag.id)
+            self._tag_labels.append(self._tag_label(tag))
+            self._refresh_tag_list()
             
             # Select the newly created tag
             self.selected_tag_id = tag.id
@@ -326,6 +529,54 @@ class MainWindow:
         except Exception as e:
             self._update_status(f"❌ Error: {e}", [0.9, 0.2, 0.2])
     
+    def _save_photos_async(self, tag: Tag, photo_paths: list):
+        """Copy a tag's photos on the IO pool and record them when done."""
+        future = self._io_pool.submit(FileManager.save_tag_photos, tag.id, photo_paths)
+        self._photo_jobs[tag.id] = (tag, future)
+        future.add_done_callback(lambda f: self._post_photos_saved(tag, f))
+    
+    def _post_photos_saved(self, tag: Tag, future):
+        """Hand a finished photo copy to the main thread (IO pool thread)."""
+        # Checked under the lock so no post can race the window closing;
+        # run() finishes jobs that were not posted
+        with self._closing_lock:
+            if self._closing:
+                return
+            gui.Application.instance.post_to_main_thread(
+                self.window,
+                lambda: self._on_photos_saved(tag, future)
+            )
+    
+    def _on_close(self) -> bool:
+        """Stop photo copies from posting to the window once it closes."""
+        with self._closing_lock:
+            self._closing = True
+        return True
+    
+    def _on_photos_saved(self, tag: Tag, future):
+        """Store the copied photo paths on the tag (main thread)."""
+        if self._photo_jobs.pop(tag.id, None) is None:
+            return  # Already handled
+        
+        try:
+            photos = future.result()
+        except Exception as e:
+            # Don't leave a partial copy behind
+            FileManager.delete_tag_photos(tag.id)
+            self._update_status(f"❌ Failed to save photos: {e}", [0.9, 0.2, 0.2])
+            return
+        
+        if self.tag_manager.get_tag_by_id(tag.id) is None:
+            # Tag was deleted while its photos were being copied
+            FileManager.delete_tag_photos(tag.id)
+            return
+        
+        self.tag_manager.update_tag_photos(tag.id, photos)
+        self._update_status(
+            f"✅ Saved '{tag.title}' with {len(photos)} photo(s)",
+            [0.2, 0.8, 0.3]
+        )
+    
     def _on_delete_tag(self):
         """Handle delete tag action."""
         if not self.selected_tag_id:
@@ -340,14 +591,14 @@ class MainWindow:
         FileManager.delete_tag_photos(self.selected_tag_id)
         
         # Remove from scene
-        if self.scene_widget.scene.has_geometry(f"tag_{self.selected_tag_id}"):
-            self.scene_widget.scene.remove_geometry(f"tag_{self.selected_tag_id}")
+        self.tag_batch.remove(self.selected_tag_id)
+        self._tag_batch_dirty = True
         
         # Remove from manager
         self.tag_manager.remove_tag(self.selected_tag_id)
         
         self._update_status(f"🗑️ Deleted '{tag.title}'", [0.8, 0.4, 0.2])
-        self.stats_label.text = f"📊 Total Tags: {len(self.tag_manager.tags)}"
+        self._update_stats()
         
         # Clear selection and move mode if deleted tag was selected
         deleted_tag_id = self.selected_tag_id
@@ -358,11 +609,13 @@ class MainWindow:
                 self.mouse_handler.set_move_mode(False)
             self.move_mode_label.text = ""
         
-        self._update_tag_list()
+        row = self._list_tag_ids.index(deleted_tag_id)
+        del self._list_tag_ids[row]
+        del self._tag_labels[row]
+        self._refresh_tag_list()
         
-        # Re-render all tags to remove highlights
-        for t in self.tag_manager.tags:
-            self._render_tag(t)
+        # Remove the highlight of the deleted tag
+        self._highlight_selected_tag()
     
     def _on_export(self):
         """Handle export action."""
@@ -371,30 +624,28 @@ class MainWindow:
                 self._update_status("⚠️ No tags to export", [0.9, 0.5, 0.2])
                 return
             
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            timestamp = time.strftime("%Y%m%d_%H%M%S")
             output_filename = f"tagged_cloud_{timestamp}.ply"
             
             # Export point cloud
-            tags_dict = [tag.to_dict() for tag in self.tag_manager.tags]
             success = self.pcd_manager.export_with_tags(
-                tags_dict,
+                self.tag_manager.coords,
+                self.tag_manager.colors,
                 output_filename
             )
             
             if success:
                 # Save metadata
                 metadata_filename = f"tagged_cloud_{timestamp}_metadata.json"
-                pcd = self.pcd_manager.get_point_cloud()
                 metadata = {
                     "original_file": str(config.POINT_CLOUD_FILE),
                     "export_date": timestamp,
-                    "original_points": len(pcd.points),
+                    "original_points": self.pcd_manager.n_points,
                     "num_tags": len(self.tag_manager.tags),
-                    "tags": tags_dict
+                    "tags": [tag.to_dict() for tag in self.tag_manager.tags]
                 }
                 
-                with open(metadata_filename, "w", encoding="utf-8") as f:
-                    json.dump(metadata, f, indent=4)
+                JsonUtils.write(metadata_filename, metadata, indent=True)
                 
                 self._update_status(
                     f"✅ Exported: {output_filename}",
@@ -417,19 +668,14 @@ class MainWindow:
             is_double_click: Whether it was a double-click
         """
         try:
-            # new_val is the item text, not an index
-            # Find the tag by matching the list item text
+            # new_val is the item text; map the selected row to its tag ID
             if not new_val or new_val == "":
                 return
             
-            # Find the tag that matches this list item text
-            tag = None
-            for t in self.tag_manager.tags:
-                # Match the format used in _update_tag_list
-                item_text = f"{t.title} - ({', '.join(f'{c:.2f}' for c in t.coords)})"
-                if item_text == new_val:
-                    tag = t
-                    break
+            index = self.tag_list.selected_index
+            if not 0 <= index < len(self._list_tag_ids):
+                return
+            tag = self.tag_manager.get_tag_by_id(self._list_tag_ids[index])
             
             if tag:
                 self.selected_tag_id = tag.id
@@ -438,7 +684,7 @@ class MainWindow:
                     [0.3, 0.6, 0.9]
                 )
                 # Update coordinate panel with selected tag coordinates
-                coord_str = f"{tag.coords[0]:.3f}, {tag.coords[1]:.3f}, {tag.coords[2]:.3f}"
+                coord_str = GeometryUtils.format_coords(tag.coords)
                 self.coord_panel.set_coordinates(coord_str)
                 # Highlight selected tag
                 self._highlight_selected_tag()
@@ -451,52 +697,90 @@ class MainWindow:
             import traceback
             traceback.print_exc()
     
+    @staticmethod
+    def _tag_label(tag: Tag) -> str:
+        """Format a tag's row in the tag list.
+        
+        Rows are cached in _tag_labels, so this only runs when a tag is
+        added or moved.
+        """
+        x, y, z = tag.coords
+        return "%s - (%.2f, %.2f, %.2f)" % (tag.title, x, y, z)
+    
     def _update_tag_list(self):
-        """Update the tag list widget."""
-        tag_items = [
-            f"{t.title} - ({', '.join(f'{c:.2f}' for c in t.coords)})"
-            for t in self.tag_manager.tags
-        ]
-        self.tag_list.set_items(tag_items)
+        """Rebuild the tag list widget from all tags.
+        
+        Edits patch the cached rows instead, so only the changed label
+        is formatted.
+        """
+        self._list_tag_ids = [t.id for t in self.tag_manager.tags]
+        self._tag_labels = [self._tag_label(t) for t in self.tag_manager.tags]
+        self._refresh_tag_list()
     
     def _render_existing_tags(self):
-        """Add existing tags to the scene."""
-        for tag in self.tag_manager.tags:
-            self._render_tag(tag)
-    
-    def _render_tag(self, tag: Tag, highlight: bool = False):
-        """Render a single tag marker in the scene."""
-        tag_dict = tag.to_dict()
-        color = tag_dict.get("color", [1, 0, 0])
-        
-        # Highlight selected tag with brighter/larger marker
-        if highlight:
-            radius = config.MARKER_RADIUS * 1.3
-            # Make color brighter
-            color = [min(1.0, c * 1.3) for c in color]
-        else:
-            radius = config.MARKER_RADIUS
-        
-        marker, _ = GeometryUtils.create_marker(
-            tag_dict["coords"],
-            color,
-            radius
-        )
-        mat = rendering.MaterialRecord()
-        mat.shader = "defaultLit"
-        mat.base_color = color + [1]
+        """Add existing tags to the scene (first tick, after the first frame)."""
+        self.tag_batch.rebuild(self.tag_manager.tags)
+        self._tag_batch_dirty = True
+    
+    def _submit_tag_batch(self):
+        """Replace the scene's tag mesh with the current batch.
         
-        geometry_name = f"tag_{tag.id}"
-        if self.scene_widget.scene.has_geometry(geometry_name):
-            self.scene_widget.scene.remove_geometry(geometry_name)
+        Handlers set _tag_batch_dirty instead of calling this, so several
+        edits within one frame cost one upload on the next tick.
+        """
+        self._tag_batch_dirty = False
+        scene = self.scene_widget.scene
+        if "tags_batch" in self._optional_geometry:
+            scene.remove_geometry("tags_batch")
+            self._optional_geometry.discard("tags_batch")
+        if not len(self.tag_batch):
+            return
         
-        self.scene_widget.scene.add_geometry(geometry_name, marker, mat)
+        # White base color so the per-vertex tag colors show through
+        scene.add_geometry(
+            "tags_batch",
+            self.tag_batch.to_mesh(),
+            self._get_material("defaultLit", WHITE_RGBA)
+        )
+        self._optional_geometry.add("tags_batch")
     
     def _highlight_selected_tag(self):
-        """Update tag rendering to highlight selected tag."""
-        for tag in self.tag_manager.tags:
-            is_selected = tag.id == self.selected_tag_id
-            self._render_tag(tag, highlight=is_selected)
+        """Draw a brighter, larger marker over the selected tag.
+        
+        The overlay mesh is added once. Selecting another tag swaps its
+        material, moving the tag moves it, and clearing the selection
+        hides it.
+        """
+        scene = self.scene_widget.scene
+        tag = self.tag_manager.get_tag_by_id(self.selected_tag_id)
+        
+        if tag is None:
+            if self._highlighted_id is not None:
+                scene.show_geometry("tag_highlight", False)
+                self._highlighted_id = None
+            return
+        
+        if tag.id != self._highlighted_id:
+            # Make color brighter. The sphere is white and shared by every
+            # highlight; the material tints it (lit color = vertex x base
+            # color, so squaring keeps the look of a painted sphere)
+            color = tuple(min(1.0, c * 1.3) ** 2 for c in (tag.color or config.DEFAULT_TAG_COLOR))
+            mat = self._get_material("defaultLit", color)
+            if "tag_highlight" in self._optional_geometry:
+                scene.modify_geometry_material("tag_highlight", mat)
+                scene.show_geometry("tag_highlight", True)
+            else:
+                scene.add_geometry(
+                    "tag_highlight",
+                    _marker_template(round(config.MARKER_RADIUS * 1.3, 4), (1.0, 1.0, 1.0)),
+                    mat
+                )
+                self._optional_geometry.add("tag_highlight")
+            self._highlighted_id = tag.id
+        
+        transform = np.eye(4)
+        transform[:3, 3] = tag.coords
+        scene.set_geometry_transform("tag_highlight", transform)
     
     def _on_key_event(self, event):
         """Handle keyboard events.
@@ -504,21 +788,19 @@ class MainWindow:
         Returns:
             bool: True to stop event propagation, False to allow normal processing
         """
+        key = event.key
+        
         # Track shift key state
-        if event.key == gui.KeyName.LEFT_SHIFT or event.key == gui.KeyName.RIGHT_SHIFT:
-            if event.type == gui.KeyEvent.Type.DOWN:
-                self.shift_pressed = True
-            elif event.type == gui.KeyEvent.Type.UP:
-                self.shift_pressed = False
+        if key in SHIFT_KEYS:
+            self.shift_pressed = event.type == gui.KeyEvent.Type.DOWN
             # Don't consume shift key events - allow normal processing
             return False
         
         # Check for Shift+M to toggle move mode
-        if event.type == gui.KeyEvent.Type.DOWN:
-            if event.key == gui.KeyName.M and self.shift_pressed:
-                self._toggle_move_mode()
-                # Consume this event to prevent further processing
-                return True
+        if key == gui.KeyName.M and self.shift_pressed and event.type == gui.KeyEvent.Type.DOWN:
+            self._toggle_move_mode()
+            # Consume this event to prevent further processing
+            return True
         
         # Allow other key events to be processed normally
         return False
@@ -583,14 +865,18 @@ class MainWindow:
         
         if success:
             # Update coordinate panel
-            coord_str = f"{new_coords_list[0]:.3f}, {new_coords_list[1]:.3f}, {new_coords_list[2]:.3f}"
+            coord_str = GeometryUtils.format_coords(new_coords_list)
             self.coord_panel.set_coordinates(coord_str)
             
             # Update tag rendering
-            self._render_tag(tag, highlight=True)
+            self.tag_batch.move(tag)
+            self._tag_batch_dirty = True
+            self._highlight_selected_tag()
             
             # Update tag list
-            self._update_tag_list()
+            row = self._list_tag_ids.index(tag.id)
+            self._tag_labels[row] = self._tag_label(tag)
+            self._refresh_tag_list()
             
             self._update_status(
                 f"✅ Moved '{tag.title}' to ({coord_str})",
@@ -602,3 +888,12 @@ class MainWindow:
     def run(self):
         """Run the application."""
         gui.Application.instance.run()
+        
+        # Finish photo copies whose callbacks never reached the closed window
+        self._on_close()
+        self._io_pool.shutdown(wait=True)
+        for tag, future in list(self._photo_jobs.values()):
+            self._on_photos_saved(tag, future)
+        
+        # Fold the session's tag journal back into tags.json
+        self.tag_manager.compact()
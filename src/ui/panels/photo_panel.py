@@ -13,7 +13,9 @@ class PhotoPanel:
         self.status_callback = status_callback
         self.photo_count_label = None
         self.current_photos = []
-        self.file_queue = queue.Queue()
+        self._dialog_requests = queue.Queue()
+        self._dialog_thread = None
+        self._dialog_pending = False  # UI thread only; one dialog at a time
         self.section = self._create_panel()
         self.window = None
     
@@ -53,56 +55,71 @@ class PhotoPanel:
     
     def _on_upload(self):
         """Handle photo upload button click."""
-        def file_dialog_thread():
+        if self._dialog_pending:
+            # Clicks while a dialog is open would queue another one behind it
+            self.status_callback("📂 File dialog already open", [0.5, 0.5, 0.5])
+            return
+        self._dialog_pending = True
+        
+        # Tk objects must stay on the thread that created them, so one
+        # long-lived thread owns the hidden root and serves every dialog
+        if self._dialog_thread is None:
+            self._dialog_thread = threading.Thread(target=self._dialog_loop, daemon=True)
+            self._dialog_thread.start()
+        self._dialog_requests.put(True)
+        self.status_callback("📂 Opening file dialog...", [0.5, 0.5, 0.5])
+    
+    def _dialog_loop(self):
+        """Open a file dialog per request from one hidden Tk root.
+        
+        The root is created by the first request that succeeds; if Tk
+        fails, that request reports no photos and the next one retries.
+        The thread never exits, so no request is left behind in the queue.
+        """
+        root = None
+        while True:
+            self._dialog_requests.get()
+            paths = []
             try:
-                root = Tk()
-                root.withdraw()
-                root.attributes('-topmost', True)
-                
-                file_paths = filedialog.askopenfilenames(
+                if root is None:
+                    new_root = Tk()
+                    new_root.withdraw()
+                    new_root.attributes('-topmost', True)
+                    root = new_root
+                paths = list(filedialog.askopenfilenames(
+                    parent=root,
                     title="Select Photos",
                     filetypes=[
                         ("Image Files", "*.jpg *.jpeg *.png *.bmp *.gif"),
                         ("All Files", "*.*")
                     ]
-                )
-                root.destroy()
-                
-                if file_paths:
-                    self.file_queue.put(list(file_paths))
-                else:
-                    self.file_queue.put(None)
+                ))
             except Exception as e:
                 print(f"❌ Error in file dialog: {e}")
-                self.file_queue.put(None)
-        
-        threading.Thread(target=file_dialog_thread, daemon=True).start()
-        self.status_callback("📂 Opening file dialog...", [0.5, 0.5, 0.5])
-        self._check_queue()
-    
-    def _check_queue(self):
-        """Check file dialog queue for results."""
-        try:
-            file_paths = self.file_queue.get_nowait()
-            if file_paths:
-                self.current_photos.extend(file_paths)
-                self.photo_count_label.text = f"📸 Photos: {len(self.current_photos)}"
-                self.status_callback(
-                    f"✅ Added {len(file_paths)} photo(s)",
-                    [0.2, 0.8, 0.3]
-                )
-            else:
-                self.status_callback(
-                    "⚠️ No photos selected",
-                    [0.8, 0.5, 0.2]
-                )
-        except queue.Empty:
+            
+            # Hand the result to the UI thread once the dialog closes
             if self.window:
                 gui.Application.instance.post_to_main_thread(
                     self.window,
-                    self._check_queue
+                    lambda paths=paths: self._apply_photos(paths)
                 )
     
+    def _apply_photos(self, file_paths):
+        """Add the photos chosen in the file dialog (UI thread)."""
+        self._dialog_pending = False
+        if file_paths:
+            self.current_photos.extend(file_paths)
+            self.photo_count_label.text = f"📸 Photos: {len(self.current_photos)}"
+            self.status_callback(
+                f"✅ Added {len(file_paths)} photo(s)",
+                [0.2, 0.8, 0.3]
+            )
+        else:
+            self.status_callback(
+                "⚠️ No photos selected",
+                [0.8, 0.5, 0.2]
+            )
+    
     def _on_clear(self):
         """Clear photo selection."""
         self.current_photos.clear()
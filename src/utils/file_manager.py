@@ -1,34 +1,216 @@
 """File management utilities for photo handling."""
-import shutil
-from pathlib import Path
-from typing import List
+import os
+import stat
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
 import config
 
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+_clonefile = None
+if sys.platform == "darwin":
+    try:
+        import ctypes
+        _clonefile = ctypes.CDLL(None, use_errno=True).clonefile
+        _clonefile.argtypes = (ctypes.c_char_p, ctypes.c_char_p, ctypes.c_uint32)
+        _clonefile.restype = ctypes.c_int
+    except (OSError, AttributeError):  # Before macOS 10.12
+        _clonefile = None
+
+FICLONE = 0x40049409  # Linux ioctl sharing the source's extents (btrfs, XFS)
+COPY_BUFFER_SIZE = 1 << 20
+_OPEN_FLAGS = getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0)
+# Metadata is set through the open descriptor where the platform allows it
+_FD_METADATA = os.chmod in os.supports_fd and os.utime in os.supports_fd
+_PHOTOS_DIR_STR = str(config.PHOTOS_DIR)  # Joined as strings; no Path objects per save
+
+_SEPARATORS = os.sep + (os.altsep or "")
+
+# Shared by every save; threads are only started on first use
+_copy_pool = ThreadPoolExecutor(max_workers=config.PHOTO_COPY_WORKERS)
+
+def _copy_fd(src_fd: int, dst_fd: int) -> None:
+    """Copy the rest of src_fd into dst_fd, cheapest method first.
+    
+    Tries a reflink clone, then copy_file_range, then sendfile, then a
+    1 MiB buffered loop. Each step continues from the current file
+    offsets, so a method that fails part way is finished by the next.
+    """
+    if fcntl is not None:
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+            return
+        except OSError:
+            pass  # Different filesystem or no reflink support
+    
+    if hasattr(os, "copy_file_range"):
+        try:
+            while os.copy_file_range(src_fd, dst_fd, 1 << 30):
+                pass
+            return
+        except OSError:
+            pass
+    
+    st = os.fstat(src_fd)
+    if hasattr(os, "sendfile") and stat.S_ISREG(st.st_mode):
+        # Explicit offsets and the known size: no trailing zero-length call
+        offset = os.lseek(src_fd, 0, os.SEEK_CUR)
+        remaining = st.st_size - offset
+        try:
+            while remaining > 0:
+                sent = os.sendfile(dst_fd, src_fd, offset, remaining)
+                if not sent:
+                    break
+                offset += sent
+                remaining -= sent
+            return
+        except OSError:
+            # Sockets only on some platforms; the loop below resumes here
+            os.lseek(src_fd, offset, os.SEEK_SET)
+    
+    buffer = bytearray(COPY_BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(src_fd, "rb", buffering=0, closefd=False) as src:
+        while True:
+            n = src.readinto(buffer)
+            if not n:
+                return
+            written = 0
+            while written < n:
+                written += os.write(dst_fd, view[written:n])
+
+def _suffix(path: str) -> str:
+    """Extension of the last path component with its dot, like os.path.splitext."""
+    name_start = max(path.rfind(sep) for sep in _SEPARATORS) + 1
+    dot = path.rfind(".")
+    return path[dot:] if dot > name_start else ""  # A leading dot is not an extension
+
+def _unlink_existing(path: str) -> None:
+    """Remove a file if there is one."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+def _copy_metadata(st: os.stat_result, target) -> None:
+    """Give target, a descriptor or path, the mode and timestamps in st."""
+    mode = stat.S_IMODE(st.st_mode)
+    if stat.S_IMODE(os.stat(target).st_mode) != mode:
+        os.chmod(target, mode)
+    os.utime(target, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+def _fastcopy(src: str, dst: str) -> None:
+    """Copy a file's contents, mode and timestamps, like shutil.copy2 minus xattrs.
+    
+    The copy is written to dst + ".part" and renamed over dst, so dst is
+    never seen half written. An earlier file at dst, which may be a hard
+    link of another photo, is replaced rather than written through.
+    """
+    part = dst + ".part"
+    _unlink_existing(part)
+    # APFS clones whole paths, attributes included
+    if _clonefile is not None and _clonefile(os.fsencode(src), os.fsencode(part), 0) == 0:
+        os.replace(part, dst)
+        return
+    
+    try:
+        src_fd = os.open(src, os.O_RDONLY | _OPEN_FLAGS)
+        try:
+            st = os.fstat(src_fd)
+            dst_fd = os.open(part, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | _OPEN_FLAGS, 0o666)
+            try:
+                _copy_fd(src_fd, dst_fd)
+                if _FD_METADATA:
+                    _copy_metadata(st, dst_fd)
+            finally:
+                os.close(dst_fd)
+        finally:
+            os.close(src_fd)
+        if not _FD_METADATA:
+            _copy_metadata(st, part)
+        os.replace(part, dst)
+    except BaseException:
+        _unlink_existing(part)
+        raise
+
+def _split_duplicates(photo_paths: List[str], saved_photos: List[str]):
+    """Split copies into first sightings of each source file and repeats.
+    
+    Sources are keyed by (st_dev, st_ino), so a file picked twice or
+    through another hard link is copied once. Returns the sources and
+    destinations to copy, and (first destination, destination) pairs.
+    """
+    seen: Dict[Tuple[int, int], str] = {}
+    sources, destinations, repeats = [], [], []
+    for src, dst in zip(photo_paths, saved_photos):
+        st = os.stat(src)
+        key = (st.st_dev, st.st_ino)
+        if key in seen:
+            repeats.append((seen[key], dst))
+        else:
+            seen[key] = dst
+            sources.append(src)
+            destinations.append(dst)
+    return sources, destinations, repeats
+
+def _link_or_copy(first: str, dst: str) -> None:
+    """Hard link a repeated photo to its first copy, copying if that fails."""
+    part = dst + ".part"
+    _unlink_existing(part)
+    try:
+        os.link(first, part)
+    except OSError:  # No hard links on this filesystem
+        _fastcopy(first, dst)
+    else:
+        os.replace(part, dst)
+
+def _remove_tree(path) -> None:
+    """Delete a directory tree using the dirent type from scandir, not a stat per entry."""
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                _remove_tree(entry.path)
+            else:
+                os.unlink(entry.path)
+    os.rmdir(path)
+
 class FileManager:
     """Manages file operations for tag photos."""
     
     @staticmethod
     def save_tag_photos(tag_id: str, photo_paths: List[str]) -> List[str]:
         """Copy photos to tag directory and return saved paths."""
-        tag_photo_dir = config.PHOTOS_DIR / tag_id
-        tag_photo_dir.mkdir(parents=True, exist_ok=True)
-        saved_photos = []
+        tag_photo_dir = os.path.join(_PHOTOS_DIR_STR, tag_id)
+        os.makedirs(tag_photo_dir, exist_ok=True)
+        prefix = os.path.join(tag_photo_dir, "photo_")  # Joined once, not per photo
+        saved_photos = [
+            f"{prefix}{idx}{_suffix(photo_path)}"
+            for idx, photo_path in enumerate(photo_paths)
+        ]
+        
+        if len(photo_paths) == 1:
+            _fastcopy(photo_paths[0], saved_photos[0])
+            return saved_photos
         
-        for idx, photo_path in enumerate(photo_paths):
-            ext = Path(photo_path).suffix
-            dest_path = tag_photo_dir / f"photo_{idx}{ext}"
-            shutil.copy2(photo_path, dest_path)
-            saved_photos.append(str(dest_path))
+        sources, destinations, repeats = _split_duplicates(photo_paths, saved_photos)
+        # Overlap the copies; list() waits for all and re-raises the first error
+        list(_copy_pool.map(_fastcopy, sources, destinations))
+        for first, dst in repeats:
+            _link_or_copy(first, dst)
         
         return saved_photos
     
     @staticmethod
     def delete_tag_photos(tag_id: str) -> bool:
         """Delete all photos associated with a tag."""
-        tag_photo_dir = config.PHOTOS_DIR / tag_id
-        if tag_photo_dir.exists():
+        tag_photo_dir = os.path.join(_PHOTOS_DIR_STR, tag_id)
+        if os.path.exists(tag_photo_dir):
             try:
-                shutil.rmtree(tag_photo_dir)
+                _remove_tree(tag_photo_dir)
                 return True
             except Exception as e:
                 print(f"❌ Error deleting photos: {e}")
@@ -1,41 +1,94 @@
 """Geometry creation and manipulation utilities."""
+import functools
 import open3d as o3d
 import numpy as np
-import random
-from typing import List, Tuple
+from typing import Iterator, List, Tuple
+import config
+
+COLOR_POOL_SIZE = 4096
+
+_rng = np.random.default_rng()
+
+def _random_colors() -> Iterator[List[float]]:
+    """Yield bright colors, drawn from the generator a pool at a time."""
+    while True:
+        yield from (_rng.random((COLOR_POOL_SIZE, 3)) * 0.4 + 0.5).tolist()
+
+_color_pool = _random_colors()
 
 class GeometryUtils:
     """Utility functions for 3D geometry operations."""
     
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def unit_sphere() -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Unit-radius marker sphere as read-only vertices, normals and triangles.
+        
+        Tessellated and given normals once; markers scale and translate copies.
+        Neither changes a unit normal, so markers reuse these as they are.
+        """
+        sphere = o3d.geometry.TriangleMesh.create_sphere(
+            radius=1.0,
+            resolution=config.MARKER_SPHERE_RESOLUTION
+        )
+        sphere.compute_vertex_normals()
+        arrays = (
+            np.asarray(sphere.vertices).copy(),
+            np.asarray(sphere.vertex_normals).copy(),
+            np.asarray(sphere.triangles, dtype=np.int32).copy()
+        )
+        for array in arrays:
+            array.setflags(write=False)
+        return arrays
+    
     @staticmethod
     def create_marker(coords: List[float], color: List[float] = None, 
                      radius: float = 0.15) -> Tuple[o3d.geometry.TriangleMesh, List[float]]:
         """Create a colored sphere marker at given coordinates."""
         if color is None:
-            color = [
-                random.random() * 0.5 + 0.5,
-                random.random() * 0.5 + 0.5,
-                random.random() * 0.5 + 0.5
-            ]
+            color = (_rng.random(3) * 0.5 + 0.5).tolist()
         
-        sphere = o3d.geometry.TriangleMesh.create_sphere(radius=radius)
-        sphere.paint_uniform_color(color)
-        sphere.compute_vertex_normals()
-        sphere.translate(coords)
+        vertices, normals, triangles = GeometryUtils.unit_sphere()
+        sphere = o3d.geometry.TriangleMesh()
+        sphere.vertices = o3d.utility.Vector3dVector(
+            vertices * radius + np.asarray(coords, dtype=np.float64)
+        )
+        sphere.vertex_normals = o3d.utility.Vector3dVector(normals)
+        sphere.triangles = o3d.utility.Vector3iVector(triangles)
+        colors = np.empty((len(vertices), 3))
+        colors[:] = color
+        sphere.vertex_colors = o3d.utility.Vector3dVector(colors)
         return sphere, color
     
     @staticmethod
-    def paint_point_cloud(pcd: o3d.geometry.PointCloud, 
-                         color: List[float]) -> None:
-        """Paint all points in a point cloud with the given color."""
-        colors = np.tile(color, (len(pcd.points), 1))
-        pcd.colors = o3d.utility.Vector3dVector(colors)
+    def marker_arrays(coords: np.ndarray, colors: np.ndarray,
+                      radius: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Vertices, normals, colors and triangles of one sphere per (N, 3) row."""
+        unit_v, unit_n, unit_t = GeometryUtils.unit_sphere()
+        coords = np.asarray(coords, dtype=np.float64).reshape(-1, 3)
+        colors = np.asarray(colors, dtype=np.float64).reshape(-1, 3)
+        offsets = np.arange(len(coords), dtype=np.int32) * len(unit_v)
+        return (
+            (unit_v[None] * radius + coords[:, None]).reshape(-1, 3),
+            np.tile(unit_n, (len(coords), 1)),
+            np.repeat(colors, len(unit_v), axis=0),
+            (unit_t[None] + offsets[:, None, None]).reshape(-1, 3)
+        )
     
     @staticmethod
     def generate_random_color() -> List[float]:
         """Generate a random bright color."""
-        return [
-            random.random() * 0.4 + 0.5,
-            random.random() * 0.4 + 0.5,
-            random.random() * 0.4 + 0.5
-        ]
+        return next(_color_pool)
+    
+    @staticmethod
+    def format_coords(coords) -> str:
+        """Format x, y, z as the "x, y, z" text used by the coordinate panel."""
+        return "%.3f, %.3f, %.3f" % (coords[0], coords[1], coords[2])
+    
+    @staticmethod
+    def parse_coords(text: str) -> List[float]:
+        """Parse "x, y, z" text into three floats; raises ValueError otherwise."""
+        parts = text.split(",")
+        if len(parts) != 3:
+            raise ValueError("Need 3 coordinates")
+        return [float(parts[0]), float(parts[1]), float(parts[2])]
@@ -0,0 +1,47 @@
+"""JSON serialization utilities."""
+import json
+from pathlib import Path
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # Optional accelerator, fall back to the standard library
+    orjson = None
+
+def _default(obj: Any) -> Any:
+    """Encode NumPy arrays and scalars for the standard library encoder."""
+    if hasattr(obj, "tolist"):
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+class JsonUtils:
+    """JSON encoding helpers that use orjson when it is installed."""
+    
+    @staticmethod
+    def dumps(data: Any, indent: bool = False) -> bytes:
+        """Serialize data to UTF-8 JSON bytes, indented by 2 if requested.
+        
+        NumPy arrays and scalars are accepted and written as plain lists/numbers.
+        """
+        if orjson is not None:
+            option = orjson.OPT_SERIALIZE_NUMPY
+            if indent:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(data, option=option)
+        if indent:
+            text = json.dumps(data, indent=2, ensure_ascii=False, default=_default)
+        else:
+            text = json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=_default)
+        return text.encode("utf-8")
+    
+    @staticmethod
+    def loads(data: bytes) -> Any:
+        """Parse JSON from bytes or text."""
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+    
+    @staticmethod
+    def write(path: Path, data: Any, indent: bool = False) -> None:
+        """Serialize data and write it to a file in one call."""
+        Path(path).write_bytes(JsonUtils.dumps(data, indent=indent))
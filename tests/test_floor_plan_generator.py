@@ -0,0 +1,65 @@
+"""Tests for the contour path of floor_plan_generator.grid_polygons.
+
+The generator is a script that runs its whole pipeline on import, so the
+functions under test are lifted out of its source and run against a
+small synthetic grid, with rasterio and OpenCV treated as absent.
+"""
+import ast
+import importlib.util
+import unittest
+from pathlib import Path
+
+GENERATOR = Path(__file__).resolve().parents[1] / "floor_plan" / "floor_plan_generator.py"
+HAVE_DEPS = all(
+    importlib.util.find_spec(name) is not None
+    for name in ("numpy", "shapely", "skimage")
+)
+
+
+def load_functions(names, namespace):
+    """Execute the named top-level functions of the generator in namespace"""
+    tree = ast.parse(GENERATOR.read_text())
+    functions = [node for node in tree.body
+                 if isinstance(node, ast.FunctionDef) and node.name in names]
+    exec(compile(ast.Module(body=functions, type_ignores=[]), str(GENERATOR), "exec"), namespace)
+    return namespace
+
+
+@unittest.skipUnless(HAVE_DEPS, "needs numpy, shapely and scikit-image")
+class GridPolygonsContourTest(unittest.TestCase):
+    def setUp(self):
+        import numpy as np
+        import shapely
+        from skimage import measure
+
+        self.np = np
+        self.namespace = load_functions({"grid_polygons", "trace_contours"}, {
+            "np": np, "shapely": shapely, "measure": measure,
+            "cv2": None, "rasterio_shapes": None,
+            "resolution": 0.02, "x_min": 0.0, "y_min": 0.0,
+            "MIN_POLYGON_AREA": 0.05,
+        })
+
+    def test_two_blocks_give_two_polygons(self):
+        grid = self.np.zeros((60, 60), dtype=self.np.int64)
+        grid[5:25, 5:25] = 3    # 0.4 m x 0.4 m block
+        grid[35:55, 30:50] = 3  # second, separate block
+        grid[45, 5] = 3         # single cell, below MIN_POLYGON_AREA
+
+        polys = self.namespace["grid_polygons"](grid)
+
+        self.assertEqual(len(polys), 2)
+        for poly in polys:
+            self.assertEqual(poly.geom_type, "Polygon")
+            self.assertTrue(poly.is_valid)
+            # The 0.5 iso-line runs halfway between occupied and empty cells,
+            # so each block outlines its 20 x 20 cells of 2 cm (corners cut)
+            self.assertAlmostEqual(poly.area, 20 * 20 * 0.02 ** 2, delta=0.001)
+
+    def test_empty_grid_gives_no_polygons(self):
+        grid = self.np.zeros((10, 10), dtype=self.np.int64)
+        self.assertEqual(self.namespace["grid_polygons"](grid), [])
+
+
+if __name__ == "__main__":
+    unittest.main()